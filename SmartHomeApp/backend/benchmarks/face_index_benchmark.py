@@ -0,0 +1,80 @@
+# benchmarks/face_index_benchmark.py: (tam ve IVF yüz indeksi karşılaştırması)
+#
+# Kullanım (backend dizininden):
+#     python -m benchmarks.face_index_benchmark
+#     python -m benchmarks.face_index_benchmark --sizes 1000 10000 --nprobe 4 8 16
+
+import argparse
+import time
+import numpy as np
+from utils.face_index import ExactFaceIndex, IVFFaceIndex, ENCODING_SIZE
+
+# dlib embedding'lerine benzer ölçek: farklı kişiler ~0.85, aynı kişi ~0.35 uzaklıkta
+IDENTITY_SCALE = 0.6
+QUERY_NOISE = 0.35
+
+
+def make_gallery(size, rng):
+    """Rastgele kimlik vektörleri üretir."""
+    gallery = rng.normal(0.0, IDENTITY_SCALE / np.sqrt(ENCODING_SIZE), (size, ENCODING_SIZE))
+    return gallery.astype(np.float32)
+
+
+def make_queries(gallery, count, rng):
+    """Galeriden seçilen kimliklerin gürültülü kopyalarını üretir."""
+    targets = rng.choice(len(gallery), count, replace=False)
+    noise = rng.normal(0.0, QUERY_NOISE / np.sqrt(ENCODING_SIZE), (count, ENCODING_SIZE))
+    return (gallery[targets] + noise).astype(np.float32), targets
+
+
+def time_search(index, queries, **options):
+    """Sorguları tek tek arar (kapı kamerası senaryosu); ortalama ms ve etiketleri döner."""
+    labels = []
+    start = time.perf_counter()
+    for query in queries:
+        found, _ = index.search(query[None, :], **options)
+        labels.append(found[0])
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000.0 / len(queries), labels
+
+
+def run(sizes, nprobes, query_count, seed):
+    rng = np.random.default_rng(seed)
+    print(f"{'N':>8} {'indeks':>14} {'build ms':>10} {'sorgu ms':>10} {'recall@1':>9}")
+    for size in sizes:
+        gallery = make_gallery(size, rng)
+        labels = list(range(size))
+        queries, targets = make_queries(gallery, min(query_count, size), rng)
+
+        exact = ExactFaceIndex()
+        start = time.perf_counter()
+        exact.build(gallery, labels)
+        build_ms = (time.perf_counter() - start) * 1000.0
+        exact_ms, exact_labels = time_search(exact, queries)
+        exact_recall = np.mean(np.array(exact_labels) == targets)
+        print(f"{size:>8} {'exact':>14} {build_ms:>10.1f} {exact_ms:>10.3f} {exact_recall:>9.3f}")
+
+        ivf = IVFFaceIndex(seed=seed)
+        start = time.perf_counter()
+        ivf.build(gallery, labels)
+        build_ms = (time.perf_counter() - start) * 1000.0
+        for nprobe in nprobes:
+            ivf_ms, ivf_labels = time_search(ivf, queries, nprobe=nprobe)
+            # Recall tam aramanın sonucuna göre ölçülür
+            recall = np.mean(np.array(ivf_labels) == np.array(exact_labels))
+            name = f"ivf/{len(ivf.centroids)} p={nprobe}"
+            print(f"{size:>8} {name:>14} {build_ms:>10.1f} {ivf_ms:>10.3f} {recall:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yüz indeksi benchmark'ı")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.nprobe, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
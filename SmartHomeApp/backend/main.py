@@ -1,20 +1,44 @@
 # main.py
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify
 from flask_cors import CORS
 from firebase_admin import db, credentials, initialize_app
 import logging
-from datetime import datetime
 import os
+import atexit
+import threading
+import time
 
 # Import blueprints
-from routes.status import status_bp
-from routes.sensor import sensor_bp, init_repositories
+from routes.status import status_bp, init_repository as init_status_repository
+from routes.sensor import sensor_bp, init_repositories, get_face_recognition, SENSOR_TYPES
 from routes.command import command_bp, init_repository as init_command_repository
-from routes.face_id import face_id_bp
+from routes.face_id import face_id_bp, init_face_pool, init_alert_engine, init_repository as init_face_id_repository
+from routes.health import health_bp, init_readiness
+from routes.scene import scene_bp, init_repository as init_scene_repository
+from routes.stream import stream_bp, init_event_hub
 
 # Import configs
 from config.logging_config import setup_logging
+from utils.request_metrics import reset_round_trips, count_round_trip, get_round_trips
+from utils.state_cache import StateCache
+from utils.firebase_listener import SubtreeListener
+from utils.event_hub import EventHub
+from utils.write_behind_buffer import WriteBehindBuffer
+from repositories.sensor_history_repository import SensorHistoryRepository
+from utils.face_recognition_pool import FaceRecognitionPool
+from utils.readiness import ReadinessTracker
+from utils.notification_dispatcher import NotificationDispatcher
+from utils.alert_engine import AlertEngine
+from utils.retention_job import RetentionJob, RetentionPolicy
+from utils.command_coalescer import CommandCoalescer
+from repositories.command_repository import CommandRepository
+from repositories.notification_repository import NotificationRepository
+
+# Yüz tanıma worker'ları (spawn) `python main.py` ile çalışırken bu modülü
+# "__mp_main__" adıyla yeniden içe aktarır; bileşenler ve arka plan işleri
+# orada kurulmaz
+IS_MAIN_PROCESS = __name__ != '__mp_main__'
 
 # Flask uygulamasını oluştur
 app = Flask(__name__)
@@ -28,109 +52,226 @@ app.register_blueprint(status_bp, url_prefix='/api')
 app.register_blueprint(sensor_bp, url_prefix='/api')
 app.register_blueprint(command_bp, url_prefix='/api')
 app.register_blueprint(face_id_bp, url_prefix='/api')
+app.register_blueprint(health_bp, url_prefix='/api')
+app.register_blueprint(scene_bp, url_prefix='/api')
+app.register_blueprint(stream_bp, url_prefix='/api')
+
+# Arka planda hazırlanan alt sistemler (/api/health/ready)
+readiness = ReadinessTracker()
+readiness.register('firebase')
+readiness.register('state_listeners', required=False)
+readiness.register('face_recognition', required=False)
+init_readiness(readiness)
+
+@app.before_request
+def start_round_trip_counter():
+    """Her istek için Firebase round trip sayacını sıfırlar."""
+    reset_round_trips()
+
+@app.after_request
+def add_round_trip_header(response):
+    """İstek boyunca yapılan Firebase round trip sayısını yanıta ekler."""
+    response.headers['X-Backend-Round-Trips'] = str(get_round_trips())
+    return response
+
+# Bileşenler (arka plan thread'leri, Firebase bağlantıları) sadece ana
+# süreçte kurulur; yüz tanıma worker'ları bunları başlatmaz
+if IS_MAIN_PROCESS:
+    # Firebase configuration
+    firebase_config = {
+        "type": os.getenv('FIREBASE_TYPE'),
+        "project_id": os.getenv('FIREBASE_PROJECT_ID'),
+        "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
+        "private_key": os.getenv('FIREBASE_PRIVATE_KEY').replace('\\n', '\n'),
+        "client_email": os.getenv('FIREBASE_CLIENT_EMAIL'),
+        "client_id": os.getenv('FIREBASE_CLIENT_ID'),
+        "auth_uri": os.getenv('FIREBASE_AUTH_URI'),
+        "token_uri": os.getenv('FIREBASE_TOKEN_URI'),
+        "auth_provider_x509_cert_url": os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
+        "client_x509_cert_url": os.getenv('FIREBASE_CLIENT_X509_CERT_URL')
+    }
+
+    # Süreç içi durum önbelleği (sensors/* ve commands/*)
+    state_cache = StateCache(
+        ttl=float(os.getenv('STATE_CACHE_TTL', '60')),
+        max_entries=int(os.getenv('STATE_CACHE_MAX_ENTRIES', '2048'))
+    )
+    # Backend dışından yapılan yazmalar için alt ağaç dinleyicileri
+    state_listeners = {path: SubtreeListener(path) for path in ('sensors', 'commands')}
+    # /api/stream istemcileri aynı listen() akışından beslenir
+    event_hub = EventHub(
+        max_queue=int(os.getenv('STREAM_CLIENT_QUEUE', '256')),
+        max_subscribers=int(os.getenv('STREAM_MAX_CLIENTS', '50'))
+    )
+
+    # Kare tanıma havuzu (worker'lar ilk istekte açılır)
+    face_pool = FaceRecognitionPool(
+        max_workers=int(os.getenv('FACE_POOL_WORKERS', '2')),
+        index_kind=os.getenv('FACE_INDEX', 'exact'),
+        nprobe=int(os.getenv('FACE_INDEX_NPROBE', '8')),
+        max_width=int(os.getenv('FACE_FRAME_MAX_WIDTH', '640'))
+    )
+    init_face_pool(face_pool)
+    atexit.register(face_pool.shutdown)
 
-# Firebase configuration
-firebase_config = {
-    "type": os.getenv('FIREBASE_TYPE'),
-    "project_id": os.getenv('FIREBASE_PROJECT_ID'),
-    "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
-    "private_key": os.getenv('FIREBASE_PRIVATE_KEY').replace('\\n', '\n'),
-    "client_email": os.getenv('FIREBASE_CLIENT_EMAIL'),
-    "client_id": os.getenv('FIREBASE_CLIENT_ID'),
-    "auth_uri": os.getenv('FIREBASE_AUTH_URI'),
-    "token_uri": os.getenv('FIREBASE_TOKEN_URI'),
-    "auth_provider_x509_cert_url": os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL'),
-    "client_x509_cert_url": os.getenv('FIREBASE_CLIENT_X509_CERT_URL')
-}
-
-try:
-    cred = credentials.Certificate(firebase_config)
-    firebase_app = initialize_app(cred, {
-        'databaseURL': f"https://{firebase_config['project_id']}-default-rtdb.europe-west1.firebasedatabase.app"
-    })
-    db_ref = db.reference('/')
-    init_repositories(db_ref)
-    init_command_repository(db_ref)
-    logger.info("Firebase başarıyla başlatıldı")
-    
-    # Test bağlantısı
     try:
-        test_data = db_ref.get()
-        logger.info("Firebase bağlantı testi başarılı")
+        cred = credentials.Certificate(firebase_config)
+        firebase_app = initialize_app(cred, {
+            'databaseURL': f"https://{firebase_config['project_id']}-default-rtdb.europe-west1.firebasedatabase.app"
+        })
+        db_ref = db.reference('/')
+
+        # Opsiyonel write-behind tamponu (SENSOR_WRITE_BEHIND_MS=0 ise kapalı)
+        sensor_write_buffer = None
+        write_behind_ms = int(os.getenv('SENSOR_WRITE_BEHIND_MS', '0'))
+        if write_behind_ms > 0:
+            sensor_write_buffer = WriteBehindBuffer(db_ref, window_ms=write_behind_ms)
+            atexit.register(sensor_write_buffer.stop)
+            logger.info(f"Sensör write-behind tamponu etkin: {write_behind_ms} ms")
+
+        # Yerel sensör geçmişi (SQLite, WAL)
+        sensor_history = None
+        if os.getenv('SENSOR_HISTORY_ENABLED', '1') == '1':
+            sensor_history = SensorHistoryRepository(
+                os.getenv('SENSOR_HISTORY_DB', os.path.join(os.path.dirname(__file__), 'data', 'sensor_history.db')),
+                flush_interval_ms=int(os.getenv('SENSOR_HISTORY_FLUSH_MS', '200')),
+                # Çözünürlük başına saklama süresi (gün), örn. SENSOR_RETENTION_HOUR_DAYS=90
+                retention={
+                    resolution: float(os.environ[f'SENSOR_RETENTION_{resolution.upper()}_DAYS']) * 86400
+                    for resolution in ('raw', 'minute', 'hour', 'day')
+                    if f'SENSOR_RETENTION_{resolution.upper()}_DAYS' in os.environ
+                }
+            )
+            atexit.register(sensor_history.close)
+
+        # Push bildirimleri ve kayıtları arka planda gönderilir
+        notification_dispatcher = NotificationDispatcher(
+            NotificationRepository(db_ref),
+            batch_window_ms=int(os.getenv('FCM_BATCH_WINDOW_MS', '200')),
+            max_retries=int(os.getenv('FCM_MAX_RETRIES', '5'))
+        )
+        atexit.register(notification_dispatcher.stop)
+
+        # Gaz alarmı histerezisi ve yüz ziyaretleri
+        gas_enter_level = SENSOR_TYPES['gas']['severity']['high'][0]
+        alert_engine = AlertEngine(
+            gas_enter_threshold=gas_enter_level,
+            gas_exit_threshold=float(os.getenv('GAS_ALERT_EXIT_LEVEL', str(gas_enter_level - 50))),
+            gas_min_interval=float(os.getenv('GAS_REALERT_INTERVAL', '300')),
+            face_visit_gap=float(os.getenv('FACE_VISIT_GAP', '60'))
+        )
+        init_alert_engine(alert_engine)
+
+        # Bildirim ve komut geçmişi saklama işi: eski kayıtlar arşivlenip silinir
+        if os.getenv('RETENTION_ENABLED', '1') == '1':
+            retention_job = RetentionJob(
+                db_ref,
+                os.getenv('RETENTION_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), 'data', 'archive')),
+                [
+                    RetentionPolicy(
+                        'notifications', 'notifications',
+                        max_age=float(os.getenv('NOTIFICATION_RETENTION_DAYS', '90')) * 86400,
+                        max_count=int(os.getenv('NOTIFICATION_MAX_COUNT', '5000'))
+                    ),
+                    RetentionPolicy(
+                        'command_history', 'command_history',
+                        max_age=float(os.getenv('COMMAND_HISTORY_RETENTION_DAYS', '30')) * 86400,
+                        max_count=int(os.getenv('COMMAND_HISTORY_MAX_COUNT', '1000')),
+                        device_depth=2
+                    )
+                ],
+                interval=float(os.getenv('RETENTION_INTERVAL_HOURS', '24')) * 3600,
+                batch_size=int(os.getenv('RETENTION_BATCH_SIZE', '500'))
+            )
+            retention_job.start()
+            atexit.register(retention_job.stop)
+
+        init_repositories(db_ref, state_cache, sensor_write_buffer, sensor_history, notification_dispatcher, alert_engine)
+        # Opsiyonel cihaz başına komut birleştirme (COMMAND_COALESCE_WINDOW_MS=0 ise kapalı)
+        command_coalescer = None
+        coalesce_window_ms = int(os.getenv('COMMAND_COALESCE_WINDOW_MS', '0'))
+        if coalesce_window_ms > 0:
+            command_coalescer = CommandCoalescer(
+                CommandRepository(db_ref, state_cache),
+                window_ms=coalesce_window_ms,
+                max_delay_ms=int(os.getenv('COMMAND_COALESCE_MAX_DELAY_MS', str(coalesce_window_ms * 4)))
+            )
+            atexit.register(command_coalescer.stop)
+            logger.info(f"Komut birleştirme etkin: {coalesce_window_ms} ms")
+
+        init_command_repository(db_ref, state_cache, command_coalescer)
+        init_scene_repository(db_ref, state_cache, command_coalescer)
+        init_face_id_repository(db_ref, state_cache)
+        init_status_repository(db_ref, state_cache)
+        init_event_hub(event_hub, db_ref, state_cache)
+        logger.info("Firebase başarıyla başlatıldı")
     except Exception as e:
-        logger.error(f"Firebase bağlantı testi başarısız: {str(e)}")
+        logger.error(f"Firebase başlatılırken hata oluştu: {str(e)}", exc_info=True)
         raise
-except Exception as e:
-    logger.error(f"Firebase başlatılırken hata oluştu: {str(e)}", exc_info=True)
-    raise
 
-@app.route('/api/sensors/bulk-update', methods=['POST'])
-def bulk_update_sensors():
+def warm_up_firebase():
     """
-    Toplu sensör güncellemesi yapar.
-    
-    Request Body:
-        {
-            "sensors": [
-                {
-                    "room": "yatak_odasi",
-                    "type": "temperature",
-                    "value": 25.5
-                },
-                {
-                    "room": "salon",
-                    "type": "light",
-                    "value": "on"
-                }
-            ]
-        }
+    Firebase bağlantısını arka planda doğrular ve dinleyicileri başlatır.
+    Kök yerine sığ (shallow) okuma yapılır: sadece üst seviye anahtarlar iner.
+    Bağlantı kurulana kadar artan aralıklarla tekrar denenir.
     """
+    delay = 1.0
+    while True:
+        try:
+            count_round_trip()
+            db_ref.get(shallow=True)
+            readiness.mark_ready('firebase')
+            logger.info("Firebase bağlantı testi başarılı")
+            break
+        except Exception as e:
+            readiness.mark_failed('firebase', e)
+            logger.error(f"Firebase bağlantı testi başarısız: {str(e)}")
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    # Eski bildirimler için okunmamış indeksi (tek seferlik geçiş)
     try:
-        data = request.get_json()
-        if not data or "sensors" not in data:
-            return jsonify({
-                "error": "Geçersiz veri formatı.",
-                "details": "sensors alanı gerekli"
-            }), 400
+        notification_dispatcher.notification_repository.ensure_unread_index()
+    except Exception as e:
+        logger.error(f"Okunmamış bildirim indeksi hazırlanamadı: {str(e)}")
 
-        sensors = data["sensors"]
-        if not isinstance(sensors, list):
-            return jsonify({
-                "error": "Geçersiz veri formatı.",
-                "details": "sensors bir liste olmalı"
-            }), 400
-
-        # Her sensör için güncelleme yap
-        for sensor in sensors:
-            if not all(key in sensor for key in ["room", "type", "value"]):
-                return jsonify({
-                    "error": "Geçersiz sensör verisi.",
-                    "details": "Her sensör room, type ve value alanlarını içermeli"
-                }), 400
-
-            # Sensör verisini güncelle
-            ref = db.reference(f"sensors/{sensor['room']}/{sensor['type']}")
-            ref.set({
-                "value": sensor["value"],
-                "timestamp": datetime.now().isoformat()
-            })
-
-        return jsonify({
-            "message": "Sensörler başarıyla güncellendi.",
-            "updated_sensors": len(sensors)
-        }), 200
+    # Önbelleği Firebase listen() akışıyla tutarlı tut
+    if os.getenv('STATE_CACHE_LISTEN', '1') == '1':
+        failed = []
+        for listener in state_listeners.values():
+            listener.add_callback(state_cache.apply_event)
+            listener.add_callback(event_hub.apply_event)
+            try:
+                listener.start()
+            except Exception as e:
+                # Dinleyici olmadan önbellek TTL ile tazelenir
+                failed.append(listener.path)
+                logger.error(f"Firebase dinleyicisi başlatılamadı ({listener.path}): {str(e)}")
+        if failed:
+            readiness.mark_failed('state_listeners', f"Başlatılamayan dinleyiciler: {', '.join(failed)}")
+        else:
+            readiness.mark_ready('state_listeners')
 
+def warm_up_face_recognition():
+    """Face ID modülünü (cv2/dlib ve galeri) arka planda yükler."""
+    try:
+        get_face_recognition()
+        readiness.mark_ready('face_recognition')
     except Exception as e:
-        logger.error(f"Toplu sensör güncellemesi sırasında hata: {str(e)}")
-        return jsonify({
-            "error": "Sensörler güncellenirken hata oluştu.",
-            "details": str(e)
-        }), 500
+        readiness.mark_failed('face_recognition', e)
+        logger.error(f"Face ID modülü yüklenemedi: {str(e)}")
+
+# Ağır alt sistemler API'yi bekletmeden arka planda ısınır
+if IS_MAIN_PROCESS:
+    threading.Thread(target=warm_up_firebase, name="firebase-warmup", daemon=True).start()
+    if os.getenv('FACE_WARMUP', '1') == '1':
+        threading.Thread(target=warm_up_face_recognition, name="face-warmup", daemon=True).start()
 
 @app.route('/sensors/<room>/temperature', methods=['GET'])
 def get_temperature(room):
     try:
         ref = db.reference(f"sensors/{room}/temperature")
+        count_round_trip()
         data = ref.get()
         if data:
             return jsonify({
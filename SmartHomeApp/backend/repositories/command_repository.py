@@ -1,18 +1,22 @@
-from datetime import datetime
 from firebase_admin import db
 import logging
+from utils.request_metrics import count_round_trip
+from utils.firebase_values import SERVER_TIMESTAMP, local_timestamp_ms, resolve_server_values
+from utils.push_id import generate_push_id
+from utils.state_cache import read_through, read_subtree_through
 
 logger = logging.getLogger(__name__)
 
 class CommandRepository:
-    def __init__(self, database):
+    def __init__(self, database, cache=None):
         self.db = database
+        # Opsiyonel write-through durum önbelleği (utils.state_cache.StateCache)
+        self.cache = cache
 
     def get_command_status(self, room, command_type):
         """Belirli bir odadaki komutun durumunu getirir."""
         try:
-            ref = self.db.child(f"commands/{room}/{command_type}")
-            command_status = ref.get()
+            command_status = read_through(self.db, self.cache, f"commands/{room}/{command_type}")
             
             if not command_status:
                 command_status = {
@@ -26,32 +30,79 @@ class CommandRepository:
             raise
 
     def send_command(self, room, command_type, command):
-        """Belirli bir odadaki komutu gönderir."""
+        """
+        Belirli bir odadaki komutu gönderir. Güncel durum ve geçmiş kaydı tek
+        bir multi-path update ile atomik olarak yazılır; zaman damgası
+        sunucuda atanır. Dönen veri yerel zaman yaklaşığını içerir.
+        """
         try:
-            timestamp = datetime.now().isoformat()
-            command_data = {
-                "value": command,
-                "timestamp": timestamp
-            }
+            return self.send_commands([(room, command_type, command)])[0]
+        except Exception as e:
+            logger.error(f"Komut gönderilirken hata: {str(e)}")
+            raise
+
+    def send_commands(self, commands, coalesced_counts=None):
+        """
+        Birden fazla komutu (sahne, toplu komut) tüm durum ve geçmiş
+        kayıtlarıyla tek bir multi-path update içinde gönderir.
+
+        Args:
+            commands (list): Doğrulanmış (room, command_type, command) demetleri
+            coalesced_counts (list, optional): Her komutun yerine geçtiği istek
+                sayısı; 1'den büyükse geçmiş kaydına coalesced_count yazılır
+
+        Returns:
+            list: Her komut için yazılan veri (yerel zaman damgasıyla), aynı sırada
+        """
+        try:
+            if not commands:
+                return []
+            timestamp_ms = local_timestamp_ms()
+            updates = {}
+            for index, (room, command_type, command) in enumerate(commands):
+                command_data = {
+                    "value": command,
+                    "timestamp": SERVER_TIMESTAMP
+                }
+                history_data = command_data
+                if coalesced_counts is not None and coalesced_counts[index] > 1:
+                    history_data = dict(command_data, coalesced_count=coalesced_counts[index])
+                updates[f"commands/{room}/{command_type}"] = command_data
+                updates[f"command_history/{room}/{command_type}/{generate_push_id(timestamp_ms)}"] = history_data
 
-            # Komut geçmişini kaydet
-            history_ref = self.db.child(f"command_history/{room}/{command_type}")
-            history_ref.push(command_data)
+            count_round_trip()
+            self.db.update(updates)
 
-            # Ana komut verisini güncelle
-            ref = self.db.child(f"commands/{room}/{command_type}")
-            ref.set(command_data)
+            written = [
+                resolve_server_values({"value": command, "timestamp": SERVER_TIMESTAMP}, timestamp_ms)
+                for _, _, command in commands
+            ]
+            if self.cache is not None:
+                for (room, command_type, _), command_data in zip(commands, written):
+                    self.cache.put(f"commands/{room}/{command_type}", command_data)
+            return written
+        except Exception as e:
+            logger.error(f"Toplu komut gönderilirken hata: {str(e)}")
+            raise
 
-            return command_data
+    def get_room_commands(self, room):
+        """Belirli bir odadaki tüm komutların son durumunu getirir."""
+        try:
+            return read_subtree_through(self.db, self.cache, f"commands/{room}")
         except Exception as e:
-            logger.error(f"Komut gönderilirken hata: {str(e)}")
+            logger.error(f"Oda komut durumları alınırken hata: {str(e)}")
             raise
 
     def get_command_history(self, room, command_type, limit=10):
-        """Belirli bir odadaki komutun geçmişini getirir."""
+        """
+        Belirli bir odadaki komutun geçmişini getirir. Anahtarlar push ID
+        olduğu için anahtar sırası zaman sırasıdır; eski ISO ve yeni epoch ms
+        zaman damgalı kayıtlar birlikte doğru sıralanır.
+        """
         try:
             ref = self.db.child(f"command_history/{room}/{command_type}")
-            history = ref.order_by_child("timestamp").limit_to_last(limit).get()
+            count_round_trip()
+            history = ref.order_by_key().limit_to_last(limit).get()
             return history
         except Exception as e:
             logger.error(f"Komut geçmişi alınırken hata: {str(e)}")
@@ -1,27 +1,68 @@
 from datetime import datetime
 from firebase_admin import db
 import logging
+from utils.request_metrics import count_round_trip
+from utils.push_id import generate_push_id
 
 logger = logging.getLogger(__name__)
 
+# Okunmamış bildirim indeksi ve sayacı: rozet için tüm liste indirilmez
+UNREAD_INDEX_PATH = "notifications_unread"
+UNREAD_COUNTER_PATH = "notification_counters/unread"
+# İndeks eski bildirimlerden bir kez oluşturulunca işaretlenir
+UNREAD_MIGRATED_PATH = "notification_counters/migrated"
+
+# Filtreli sayfalamada tek istekte taranacak en fazla sayfa sayısı
+MAX_SCAN_PAGES = 10
+
+def unread_increment(count):
+    """Okunmamış sayacını sunucuda atomik olarak değiştiren değer."""
+    return {".sv": {"increment": count}}
+
 class NotificationRepository:
     def __init__(self, database):
         self.db = database
+        self._index_ready = False
+
+    def ensure_unread_index(self):
+        """
+        Okunmamış indeksi ve sayaç eski bildirimlerden henüz oluşturulmadıysa
+        oluşturur. Geçiş işareti instance başına bir kez okunur.
+        """
+        if self._index_ready:
+            return
+        count_round_trip()
+        if not self.db.child(UNREAD_MIGRATED_PATH).get():
+            self.rebuild_unread_index()
+        self._index_ready = True
 
-    def save_notification(self, title, message, notification_type, severity=None, sensor_value=None):
-        """Yeni bir bildirim kaydeder."""
+    def save_notification(self, title, message, notification_type, severity=None, sensor_value=None, timestamp=None):
+        """
+        Yeni bir bildirim kaydeder. Bildirim, okunmamış indeksi ve sayaç tek
+        bir multi-path update ile yazılır.
+
+        Returns:
+            str: Bildirim ID'si
+        """
         try:
-            ref = self.db.child("notifications")
+            self.ensure_unread_index()
+            notification_id = generate_push_id()
             notification_data = {
                 "title": title,
                 "message": message,
                 "type": notification_type,
                 "severity": severity,
                 "sensor_value": sensor_value,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp or datetime.now().isoformat(),
                 "read": False
             }
-            return ref.push(notification_data)
+            count_round_trip()
+            self.db.update({
+                f"notifications/{notification_id}": notification_data,
+                f"{UNREAD_INDEX_PATH}/{notification_id}": True,
+                UNREAD_COUNTER_PATH: unread_increment(1)
+            })
+            return notification_id
         except Exception as e:
             logger.error(f"Bildirim kaydedilirken hata: {str(e)}")
             raise
@@ -30,17 +71,239 @@ class NotificationRepository:
         """Tüm bildirimleri getirir."""
         try:
             ref = self.db.child("notifications")
+            count_round_trip()
             return ref.get()
         except Exception as e:
             logger.error(f"Bildirimler alınırken hata: {str(e)}")
             raise
 
+    def get_notifications(self, limit=20, before=None, notification_type=None, severity=None):
+        """
+        Bildirimleri en yeniden eskiye sayfalı getirir.
+
+        Anahtarlar push ID olduğu için anahtar sırası zaman sırasıdır; her
+        sayfa order_by_key + limit_to_last ile sadece gereken kadar okunur.
+        Tip/önem filtresi verilirse sayfalar, istenen sayıda eşleşme
+        bulunana ya da MAX_SCAN_PAGES dolana kadar geriye doğru taranır.
+
+        Args:
+            limit (int): Sayfa başına bildirim sayısı
+            before (str, optional): Bu ID'den daha eski bildirimler getirilir
+            notification_type (str, optional): Tip filtresi (örn. "gas_alert")
+            severity (str, optional): Önem filtresi (örn. "high")
+
+        Returns:
+            dict: {"notifications": [...], "next_before": sonraki sayfa imleci ya da None}
+        """
+        try:
+            filtered = notification_type is not None or severity is not None
+            page_size = limit if not filtered else max(limit * 2, 50)
+            results = []
+            cursor = before
+            next_before = None
+
+            for _ in range(MAX_SCAN_PAGES):
+                query = self.db.child("notifications").order_by_key()
+                if cursor is not None:
+                    # end_at imleci de kapsar, bir fazlası istenip atılır
+                    query = query.end_at(cursor).limit_to_last(page_size + 1)
+                else:
+                    query = query.limit_to_last(page_size)
+                count_round_trip()
+                page = query.get() or {}
+                keys = sorted((key for key in page if key != cursor), reverse=True)
+
+                for key in keys:
+                    item = page[key]
+                    if not isinstance(item, dict):
+                        continue
+                    if notification_type is not None and item.get("type") != notification_type:
+                        continue
+                    if severity is not None and item.get("severity") != severity:
+                        continue
+                    results.append(dict(item, id=key))
+                    if len(results) == limit:
+                        break
+
+                if len(results) == limit:
+                    next_before = results[-1]["id"]
+                    break
+                if len(keys) < page_size:
+                    # Daha eski bildirim kalmadı
+                    next_before = None
+                    break
+                # Taranan en eski anahtardan devam et
+                cursor = keys[-1]
+                next_before = cursor
+
+            return {"notifications": results, "next_before": next_before}
+        except Exception as e:
+            logger.error(f"Bildirimler alınırken hata: {str(e)}")
+            raise
+
+    def get_unread_count(self):
+        """Okunmamış bildirim sayısını sayaçtan okur; sayaç yoksa indeksi oluşturur."""
+        try:
+            self.ensure_unread_index()
+            count_round_trip()
+            count = self.db.child(UNREAD_COUNTER_PATH).get()
+            if count is None:
+                count = self.rebuild_unread_index()
+            return max(int(count), 0)
+        except Exception as e:
+            logger.error(f"Okunmamış bildirim sayısı alınırken hata: {str(e)}")
+            raise
+
+    def rebuild_unread_index(self):
+        """
+        Okunmamış indeksini ve sayacı bildirimlerden yeniden oluşturur (tek
+        seferlik geçiş ya da onarım için; tüm listeyi okur).
+
+        Returns:
+            int: Okunmamış bildirim sayısı
+        """
+        try:
+            notifications = self.get_all_notifications() or {}
+            unread = {
+                notification_id: True
+                for notification_id, item in notifications.items()
+                if isinstance(item, dict) and not item.get("read", False)
+            }
+            count_round_trip()
+            self.db.update({
+                UNREAD_INDEX_PATH: unread or None,
+                UNREAD_COUNTER_PATH: len(unread),
+                UNREAD_MIGRATED_PATH: True
+            })
+            logger.info(f"Okunmamış bildirim indeksi oluşturuldu: {len(unread)} bildirim")
+            return len(unread)
+        except Exception as e:
+            logger.error(f"Okunmamış bildirim indeksi oluşturulurken hata: {str(e)}")
+            raise
+
+    def _read_entries(self, path, notification_ids):
+        """
+        path altındaki sadece istenen ID'lerin kayıtlarını okur. Tek ID doğrudan,
+        birden fazlası en küçük ve en büyük ID arasındaki anahtar aralığıyla
+        tek istekte okunur (push ID sırası zaman sırası olduğu için seçilen
+        bildirimler genelde bitişiktir).
+
+        Returns:
+            dict: ID -> kayıt (olmayan ID'ler yer almaz)
+        """
+        count_round_trip()
+        if len(notification_ids) == 1:
+            notification_id = notification_ids[0]
+            value = self.db.child(f"{path}/{notification_id}").get()
+            return {notification_id: value} if value is not None else {}
+        entries = self.db.child(path).order_by_key() \
+            .start_at(min(notification_ids)).end_at(max(notification_ids)).get() or {}
+        wanted = set(notification_ids)
+        return {key: value for key, value in entries.items() if key in wanted}
+
+    def unread_ids(self, notification_ids):
+        """
+        Verilen ID'lerden okunmamış indeksinde bulunanları döner; indeksin
+        sadece istenen kısmı okunur.
+
+        Returns:
+            list: Okunmamış bildirim ID'leri
+        """
+        notification_ids = list(dict.fromkeys(notification_ids))
+        if not notification_ids:
+            return []
+        self.ensure_unread_index()
+        return list(self._read_entries(UNREAD_INDEX_PATH, notification_ids))
+
+    def _mark_unread_as_read(self, unread):
+        # unread: indekste bulunan ID'ler; read alanları, indeks ve sayaç birlikte yazılır
+        if not unread:
+            return 0
+        updates = {}
+        for notification_id in unread:
+            updates[f"notifications/{notification_id}/read"] = True
+            updates[f"{UNREAD_INDEX_PATH}/{notification_id}"] = None
+        updates[UNREAD_COUNTER_PATH] = unread_increment(-len(unread))
+        count_round_trip()
+        self.db.update(updates)
+        return len(unread)
+
+    def mark_many_as_read(self, notification_ids):
+        """
+        Birden fazla bildirimi okundu yapar. Okunmamış bildirimler indeksten
+        bulunur; read alanları, indeks kayıtları ve sayaç tek bir multi-path
+        update ile yazılır. Olmayan ya da zaten okunmuş ID'ler için yazma
+        yapılmaz.
+
+        Aynı bildirim eşzamanlı iki istekle okundu yapılırsa sayaç iki kez
+        azalabilir; okunan değer 0'ın altına inmez ve rebuild_unread_index
+        ile onarılabilir.
+
+        Returns:
+            int: Okundu yapılan bildirim sayısı
+        """
+        try:
+            return self._mark_unread_as_read(self.unread_ids(notification_ids))
+        except Exception as e:
+            logger.error(f"Bildirimler okundu olarak işaretlenirken hata: {str(e)}")
+            raise
+
+    def delete_many(self, notification_ids):
+        """
+        Birden fazla bildirimi siler. Sadece istenen bildirimler okunur;
+        kayıtlar, indeks kayıtları ve sayaç tek bir multi-path update ile
+        yazılır. Sayaç, silinen okunmamış bildirimler kadar azalır (read
+        alanı ve indeks aynı update'lerle değiştiği için birbirine eşittir).
+
+        Returns:
+            int: Silinen (var olan) bildirim sayısı
+        """
+        try:
+            notification_ids = list(dict.fromkeys(notification_ids))
+            if not notification_ids:
+                return 0
+            self.ensure_unread_index()
+            existing = self._read_entries("notifications", notification_ids)
+            if not existing:
+                return 0
+            updates = {}
+            unread = 0
+            for notification_id, item in existing.items():
+                updates[f"notifications/{notification_id}"] = None
+                updates[f"{UNREAD_INDEX_PATH}/{notification_id}"] = None
+                if isinstance(item, dict) and not item.get("read", False):
+                    unread += 1
+            if unread:
+                updates[UNREAD_COUNTER_PATH] = unread_increment(-unread)
+            count_round_trip()
+            self.db.update(updates)
+            return len(existing)
+        except Exception as e:
+            logger.error(f"Bildirimler silinirken hata: {str(e)}")
+            raise
+
+    def mark_all_read_before(self, before):
+        """
+        Verilen imleçten (push ID ya da zaman öneki) eski tüm okunmamış
+        bildirimleri okundu yapar. Adaylar okunmamış indeksinden anahtar
+        sırasıyla bulunur, tüm liste okunmaz.
+
+        Returns:
+            int: Okundu yapılan bildirim sayısı
+        """
+        try:
+            self.ensure_unread_index()
+            count_round_trip()
+            candidates = self.db.child(UNREAD_INDEX_PATH).order_by_key().end_at(before).get() or {}
+            return self._mark_unread_as_read([key for key in candidates if key != before])
+        except Exception as e:
+            logger.error(f"Bildirimler okundu olarak işaretlenirken hata: {str(e)}")
+            raise
+
     def delete_notification(self, notification_id):
         """Belirli bir bildirimi siler."""
         try:
-            ref = self.db.child(f"notifications/{notification_id}")
-            ref.delete()
-            return True
+            return self.delete_many([notification_id]) > 0
         except Exception as e:
             logger.error(f"Bildirim silinirken hata: {str(e)}")
             raise
@@ -48,9 +311,7 @@ class NotificationRepository:
     def mark_as_read(self, notification_id):
         """Belirli bir bildirimi okundu olarak işaretler."""
         try:
-            ref = self.db.child(f"notifications/{notification_id}")
-            ref.update({"read": True})
-            return True
+            return self.mark_many_as_read([notification_id]) > 0
         except Exception as e:
             logger.error(f"Bildirim okundu olarak işaretlenirken hata: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,311 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    room TEXT NOT NULL,
+    sensor_type TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL,
+    text_value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sensor_readings_room_type_ts
+    ON sensor_readings (room, sensor_type, ts);
+CREATE TABLE IF NOT EXISTS sensor_rollups (
+    room TEXT NOT NULL,
+    sensor_type TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sum REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (room, sensor_type, resolution, bucket)
+);
+"""
+
+# Özet çözünürlükleri (saniye)
+ROLLUP_RESOLUTIONS = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400
+}
+
+# Varsayılan saklama süreleri (saniye); "raw" ham okumalar içindir
+DEFAULT_RETENTION = {
+    "raw": 30 * 86400,
+    "minute": 2 * 86400,
+    "hour": 90 * 86400,
+    "day": 5 * 365 * 86400
+}
+
+
+class SensorHistoryRepository:
+    """
+    Kabul edilen sensör okumalarını yerel, sadece eklemeli bir SQLite (WAL)
+    zaman serisine yazar. Yazmalar bellekte toplanıp arka plan thread'inden
+    toplu olarak kaydedilir, böylece ingest gecikmesi sabit kalır.
+
+    Sayısal okumalar ayrıca dakika/saat/gün kovalarında min/max/avg özetlerine
+    eklenir. Özetler okuma başına O(1) güncellenir: bellekte sadece son
+    flush'tan beri değişen kovaların farkları tutulur ve flush sırasında
+    tablodaki kovayla birleştirilir. Her çözünürlüğün saklama süresi ayrıdır.
+    """
+
+    def __init__(self, db_path, flush_interval_ms=200, max_pending=10000,
+                 retention=None, prune_interval=3600):
+        self.db_path = db_path
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.retention = dict(DEFAULT_RETENTION)
+        self.retention.update(retention or {})
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._pending = deque(maxlen=max_pending)
+        # (room, sensor_type, resolution, bucket) -> [min, max, sum, count]
+        self._rollup_deltas = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self.dropped = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+        self._thread = threading.Thread(target=self._run, name="sensor-history-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, room, sensor_type, value, ts=None):
+        """
+        Bir okumayı yazma kuyruğuna ekler (diske bir sonraki flush'ta yazılır).
+
+        Args:
+            room (str): Oda adı
+            sensor_type (str): Sensör tipi
+            value: Okunan değer (sayısal değerler value, diğerleri text_value sütununa)
+            ts (float, optional): Epoch saniye, verilmezse şimdiki zaman
+        """
+        if ts is None:
+            ts = time.time()
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            row = (room, sensor_type, float(ts), float(value), None)
+        else:
+            row = (room, sensor_type, float(ts), None, str(value))
+        with self._lock:
+            if len(self._pending) == self.max_pending:
+                # Disk yetişemiyorsa en eski okuma atılır, ingest bloklanmaz
+                self.dropped += 1
+            self._pending.append(row)
+            if row[3] is not None:
+                self._add_to_rollups(room, sensor_type, row[2], row[3])
+
+    def _add_to_rollups(self, room, sensor_type, ts, value):
+        # Kilit tutulurken çağrılır; her çözünürlük için O(1)
+        for resolution, seconds in ROLLUP_RESOLUTIONS.items():
+            key = (room, sensor_type, resolution, int(ts // seconds) * seconds)
+            delta = self._rollup_deltas.get(key)
+            if delta is None:
+                self._rollup_deltas[key] = [value, value, value, 1]
+            else:
+                if value < delta[0]:
+                    delta[0] = value
+                if value > delta[1]:
+                    delta[1] = value
+                delta[2] += value
+                delta[3] += 1
+
+    def flush(self):
+        """Bekleyen okumaları ve özet farklarını tek bir transaction ile diske yazar."""
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._pending)
+                self._pending.clear()
+                deltas, self._rollup_deltas = self._rollup_deltas, {}
+            if not rows and not deltas:
+                return 0
+            try:
+                connection = self._connection()
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO sensor_readings (room, sensor_type, ts, value, text_value) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    connection.executemany(
+                        "INSERT INTO sensor_rollups (room, sensor_type, resolution, bucket, min, max, sum, count) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (room, sensor_type, resolution, bucket) DO UPDATE SET "
+                        "min = MIN(min, excluded.min), max = MAX(max, excluded.max), "
+                        "sum = sum + excluded.sum, count = count + excluded.count",
+                        [key + tuple(delta) for key, delta in deltas.items()]
+                    )
+                return len(rows)
+            except Exception as e:
+                logger.error(f"Sensör geçmişi yazılırken hata: {str(e)}")
+                with self._lock:
+                    # Okumaları sıralarını koruyarak tekrar kuyruğa al
+                    self._pending.extendleft(reversed(rows))
+                    for key, delta in deltas.items():
+                        self._merge_delta(key, delta)
+                raise
+
+    def _merge_delta(self, key, delta):
+        # Kilit tutulurken çağrılır
+        current = self._rollup_deltas.get(key)
+        if current is None:
+            self._rollup_deltas[key] = delta
+        else:
+            current[0] = min(current[0], delta[0])
+            current[1] = max(current[1], delta[1])
+            current[2] += delta[2]
+            current[3] += delta[3]
+
+    def prune(self, now=None):
+        """Saklama süresini aşan ham okumaları ve özet kovalarını siler."""
+        if now is None:
+            now = time.time()
+        try:
+            connection = self._connection()
+            with connection:
+                raw_retention = self.retention.get("raw")
+                if raw_retention:
+                    connection.execute(
+                        "DELETE FROM sensor_readings WHERE ts < ?",
+                        (now - raw_retention,)
+                    )
+                for resolution in ROLLUP_RESOLUTIONS:
+                    resolution_retention = self.retention.get(resolution)
+                    if resolution_retention:
+                        connection.execute(
+                            "DELETE FROM sensor_rollups WHERE resolution = ? AND bucket < ?",
+                            (resolution, now - resolution_retention)
+                        )
+            self._last_prune = now
+        except Exception as e:
+            logger.error(f"Sensör geçmişi temizlenirken hata: {str(e)}")
+            raise
+
+    def get_rollups(self, room, sensor_type, resolution, start, end, limit=5000):
+        """
+        Bir sensörün hazır özet kovalarını getirir.
+
+        Args:
+            room (str): Oda adı
+            sensor_type (str): Sensör tipi
+            resolution (str): "minute", "hour" veya "day"
+            start (float): Başlangıç (epoch saniye)
+            end (float): Bitiş (epoch saniye)
+            limit (int): Dönecek maksimum kova sayısı
+
+        Returns:
+            list: Zamana göre sıralı {"ts", "min", "max", "avg", "count"} kovaları
+        """
+        try:
+            self.flush()
+            seconds = ROLLUP_RESOLUTIONS[resolution]
+            rows = self._connection().execute(
+                "SELECT bucket, min, max, sum, count FROM sensor_rollups "
+                "WHERE room = ? AND sensor_type = ? AND resolution = ? AND bucket BETWEEN ? AND ? "
+                "ORDER BY bucket LIMIT ?",
+                (room, sensor_type, resolution, int(start // seconds) * seconds, end, limit)
+            ).fetchall()
+            return [
+                {"ts": bucket, "min": min_value, "max": max_value, "avg": total / count, "count": count}
+                for bucket, min_value, max_value, total, count in rows
+            ]
+        except Exception as e:
+            logger.error(f"Sensör özetleri alınırken hata: {str(e)}")
+            raise
+
+    def get_history(self, room, sensor_type, start, end, step=None, limit=5000):
+        """
+        Bir sensörün zaman aralığındaki okumalarını getirir.
+
+        Args:
+            room (str): Oda adı
+            sensor_type (str): Sensör tipi
+            start (float): Başlangıç (epoch saniye, dahil)
+            end (float): Bitiş (epoch saniye, dahil)
+            step (int, optional): Saniye cinsinden kova genişliği. Verilirse
+                her kova için min/max/avg döner; dakika/saat/gün adımları
+                hazır özetlerden okunur.
+            limit (int): Dönecek maksimum nokta sayısı
+
+        Returns:
+            list: Zamana göre sıralı noktalar
+        """
+        try:
+            for resolution, seconds in ROLLUP_RESOLUTIONS.items():
+                if step == seconds:
+                    return self.get_rollups(room, sensor_type, resolution, start, end, limit)
+
+            # Henüz diske yazılmamış okumalar da sorguya dahil olsun
+            self.flush()
+            connection = self._connection()
+            if step:
+                rows = connection.execute(
+                    "SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, MIN(value), MAX(value), AVG(value), COUNT(*) "
+                    "FROM sensor_readings "
+                    "WHERE room = ? AND sensor_type = ? AND ts BETWEEN ? AND ? "
+                    "GROUP BY bucket ORDER BY bucket LIMIT ?",
+                    (step, step, room, sensor_type, start, end, limit)
+                ).fetchall()
+                return [
+                    {"ts": bucket, "min": min_value, "max": max_value, "avg": avg_value, "count": count}
+                    for bucket, min_value, max_value, avg_value, count in rows
+                ]
+
+            rows = connection.execute(
+                "SELECT ts, value, text_value FROM sensor_readings "
+                "WHERE room = ? AND sensor_type = ? AND ts BETWEEN ? AND ? "
+                "ORDER BY ts LIMIT ?",
+                (room, sensor_type, start, end, limit)
+            ).fetchall()
+            return [
+                {"ts": ts, "value": value if text_value is None else text_value}
+                for ts, value, text_value in rows
+            ]
+        except Exception as e:
+            logger.error(f"Sensör geçmişi alınırken hata: {str(e)}")
+            raise
+
+    def close(self):
+        """Yazıcı thread'ini durdurur ve kalan okumaları kaydeder."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _connection(self):
+        # SQLite bağlantıları thread'ler arasında paylaşılmaz
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - self._last_prune >= self.prune_interval:
+                    self.prune()
+            except Exception:
+                # Hata loglandı; okumalar bir sonraki turda tekrar denenir
+                pass
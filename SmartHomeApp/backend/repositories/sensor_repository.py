@@ -1,41 +1,113 @@
 from datetime import datetime
 from firebase_admin import db
 import logging
+from utils.request_metrics import count_round_trip
+from utils.state_cache import read_through, read_subtree_through
 
 logger = logging.getLogger(__name__)
 
 class SensorRepository:
-    def __init__(self, database):
+    def __init__(self, database, cache=None, write_buffer=None, history=None):
         self.db = database
+        # Opsiyonel write-through durum önbelleği (utils.state_cache.StateCache)
+        self.cache = cache
+        # Opsiyonel write-behind tamponu (utils.write_behind_buffer.WriteBehindBuffer)
+        self.write_buffer = write_buffer
+        # Opsiyonel yerel zaman serisi (repositories.sensor_history_repository)
+        self.history = history
 
     def get_sensor_data(self, room, sensor_type):
         """Belirli bir odadaki sensörün verisini getirir."""
         try:
-            ref = self.db.child(f"sensors/{room}/{sensor_type}")
-            return ref.get()
+            return read_through(self.db, self.cache, f"sensors/{room}/{sensor_type}")
         except Exception as e:
             logger.error(f"Sensör verisi alınırken hata: {str(e)}")
             raise
 
-    def update_sensor_data(self, room, sensor_type, value):
-        """Belirli bir odadaki sensörün verisini günceller."""
+    def update_sensor_data(self, room, sensor_type, value, critical=False):
+        """
+        Belirli bir odadaki sensörün verisini günceller.
+
+        Write-behind tamponu varsa yazma tampona eklenir ve pencere sonunda
+        diğer okumalarla birlikte yazılır; critical=True ise hemen yazılır.
+        """
         try:
-            ref = self.db.child(f"sensors/{room}/{sensor_type}")
             data = {
                 "value": value,
                 "timestamp": datetime.now().isoformat()
             }
-            ref.set(data)
+            self.set_sensor_state(room, sensor_type, data, critical=critical)
+            if self.history is not None:
+                self.history.record(room, sensor_type, value)
             return data
         except Exception as e:
             logger.error(f"Sensör verisi güncellenirken hata: {str(e)}")
             raise
 
+    def set_sensor_state(self, room, sensor_type, data, critical=False):
+        """
+        Sensör düğümüne verilen veriyi olduğu gibi yazar (value/timestamp
+        dışında alanları olan durumlar için, örn. face_id). Yazma
+        update_sensor_data ile aynı tampon ve önbellek yolundan geçer.
+        """
+        path = f"sensors/{room}/{sensor_type}"
+        if self.write_buffer is not None:
+            if critical:
+                count_round_trip()
+            self.write_buffer.submit(path, data, critical=critical)
+        else:
+            count_round_trip()
+            self.db.child(path).set(data)
+        if self.cache is not None:
+            self.cache.put(path, data)
+        return data
+
+    def bulk_update_sensor_data(self, readings):
+        """
+        Birden fazla sensörü tek bir multi-path update ile atomik olarak günceller.
+
+        Args:
+            readings (list): (room, sensor_type, value) demetleri
+
+        Returns:
+            dict: "sensors/<room>/<type>" -> yazılan veri
+        """
+        try:
+            # Tüm grup tek bir zaman damgasıyla yazılır
+            timestamp = datetime.now().isoformat()
+            updates = {}
+            for room, sensor_type, value in readings:
+                updates[f"sensors/{room}/{sensor_type}"] = {
+                    "value": value,
+                    "timestamp": timestamp
+                }
+            if not updates:
+                return {}
+
+            count_round_trip()
+            if self.write_buffer is not None:
+                # Bekleyen eski değerler bu yazmanın üzerine sonradan yazılmasın
+                for path, data in updates.items():
+                    self.write_buffer.submit(path, data)
+                self.write_buffer.flush()
+            else:
+                self.db.update(updates)
+
+            if self.cache is not None:
+                for path, data in updates.items():
+                    self.cache.put(path, data)
+            if self.history is not None:
+                for room, sensor_type, value in readings:
+                    self.history.record(room, sensor_type, value)
+            return updates
+        except Exception as e:
+            logger.error(f"Toplu sensör güncellemesi sırasında hata: {str(e)}")
+            raise
+
     def get_all_sensors(self):
         """Tüm sensörlerin verilerini getirir."""
         try:
-            ref = self.db.child("sensors")
-            return ref.get()
+            return read_subtree_through(self.db, self.cache, "sensors")
         except Exception as e:
             logger.error(f"Tüm sensör verileri alınırken hata: {str(e)}")
             raise
@@ -43,8 +115,24 @@ class SensorRepository:
     def get_room_sensors(self, room):
         """Belirli bir odadaki tüm sensörlerin verilerini getirir."""
         try:
-            ref = self.db.child(f"sensors/{room}")
-            return ref.get()
+            return read_subtree_through(self.db, self.cache, f"sensors/{room}")
         except Exception as e:
             logger.error(f"Oda sensör verileri alınırken hata: {str(e)}")
+            raise
+
+    def get_sensors_snapshot(self, room=None):
+        """
+        sensors/ alt ağacını (veya tek bir odanınkini) tek okumada getirir.
+
+        Args:
+            room (str, optional): Oda adı. Verilmezse tüm odalar okunur.
+
+        Returns:
+            dict: room -> sensor_type -> veri (room verilirse sensor_type -> veri)
+        """
+        try:
+            snapshot = self.get_room_sensors(room) if room else self.get_all_sensors()
+            return snapshot if isinstance(snapshot, dict) else {}
+        except Exception as e:
+            logger.error(f"Sensör anlık görüntüsü alınırken hata: {str(e)}")
             raise 
\ No newline at end of file
@@ -10,11 +10,14 @@ command_bp = Blueprint('command', __name__)
 
 # Global repository instance
 command_repository = None
+# Opsiyonel cihaz başına komut birleştirici (utils.command_coalescer.CommandCoalescer)
+command_coalescer = None
 
-def init_repository(database):
+def init_repository(database, cache=None, coalescer=None):
     """Repository'yi başlat"""
-    global command_repository
-    command_repository = CommandRepository(database)
+    global command_repository, command_coalescer
+    command_repository = CommandRepository(database, cache)
+    command_coalescer = coalescer
 
 # Desteklenen komut tipleri
 COMMAND_TYPES = {
@@ -45,6 +48,49 @@ COMMAND_TYPES = {
     }
 }
 
+def validate_command(room, command_type, command):
+    """
+    Bir komutu COMMAND_TYPES'a göre doğrular.
+
+    Returns:
+        tuple: (normalize edilmiş komut, None) ya da geçersizse
+        (None, {"error": ..., "details": ...})
+    """
+    if command_type not in COMMAND_TYPES:
+        return None, {
+            "error": "Geçersiz komut tipi.",
+            "details": f"Desteklenen komutlar: {', '.join(COMMAND_TYPES.keys())}"
+        }
+
+    command_config = COMMAND_TYPES[command_type]
+    if room not in command_config["rooms"]:
+        return None, {
+            "error": "Geçersiz oda-komut kombinasyonu.",
+            "details": f"{command_type} komutu {room} odasında bulunmuyor."
+        }
+
+    if command_config["type"] == "binary":
+        if command not in command_config["values"]:
+            return None, {
+                "error": "Geçersiz komut.",
+                "details": f"{command_type} için geçerli komutlar: {', '.join(command_config['values'])}"
+            }
+    elif command_config["type"] == "numeric":
+        try:
+            command = float(command)
+        except (TypeError, ValueError):
+            return None, {
+                "error": "Geçersiz sıcaklık değeri.",
+                "details": "Sıcaklık sayısal bir değer olmalı."
+            }
+        if not (command_config["min"] <= command <= command_config["max"]):
+            return None, {
+                "error": "Geçersiz sıcaklık değeri.",
+                "details": f"Sıcaklık {command_config['min']} ile {command_config['max']} arasında olmalı."
+            }
+
+    return command, None
+
 @command_bp.route('/command/<room>/<command_type>', methods=['GET'])
 def get_command_status(room, command_type):
     """
@@ -87,7 +133,9 @@ def get_command_status(room, command_type):
             "details": str(e)
         }), 500
 
-@command_bp.route('/command/<room>/<command_type>', methods=['POST'])
+# POST /command/<room>/<type> routes/sensor.py'deki sensör durumu yoluna
+# ait; komut durumu ve geçmişi yazan gönderim ayrı yoldadır
+@command_bp.route('/command/<room>/<command_type>/send', methods=['POST'])
 def send_command(room, command_type):
     """
     Belirli bir odadaki komutu gönderir.
@@ -124,40 +172,28 @@ def send_command(room, command_type):
                 "details": "command alanı gerekli"
             }), 400
 
-        command = data["command"]
-        command_config = COMMAND_TYPES[command_type]
-
         # Komut validasyonu
-        if command_config["type"] == "binary":
-            if command not in command_config["values"]:
-                return jsonify({
-                    "error": "Geçersiz komut.",
-                    "details": f"{command_type} için geçerli komutlar: {', '.join(command_config['values'])}"
-                }), 400
-        elif command_config["type"] == "numeric":
-            try:
-                command = float(command)
-                if not (command_config["min"] <= command <= command_config["max"]):
-                    return jsonify({
-                        "error": "Geçersiz sıcaklık değeri.",
-                        "details": f"Sıcaklık {command_config['min']} ile {command_config['max']} arasında olmalı."
-                    }), 400
-            except ValueError:
-                return jsonify({
-                    "error": "Geçersiz sıcaklık değeri.",
-                    "details": "Sıcaklık sayısal bir değer olmalı."
-                }), 400
-
-        # Komutu gönder
-        command_data = command_repository.send_command(room, command_type, command)
+        command, error = validate_command(room, command_type, data["command"])
+        if error:
+            return jsonify(error), 400
 
-        return jsonify({
+        # Komutu gönder (birleştirici varsa kısa pencere sonunda yazılır)
+        if command_coalescer is not None:
+            command_data = command_coalescer.submit(room, command_type, command)
+        else:
+            command_data = command_repository.send_command(room, command_type, command)
+
+        response = {
             "message": f"{room} odasındaki {command_type} için komut gönderildi.",
             "room": room,
             "command_type": command_type,
             "command": command,
             "timestamp": command_data["timestamp"]
-        }), 200
+        }
+        if command_data.get("pending"):
+            response["pending"] = True
+            response["coalesced_count"] = command_data["coalesced_count"]
+        return jsonify(response), 200
 
     except Exception as e:
         logging.error(f"Komut gönderilirken hata: {str(e)}")
@@ -1,12 +1,74 @@
 from flask import Blueprint, request, jsonify
-from firebase_admin import db
 import logging
 from datetime import datetime
 import json
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from repositories.notification_repository import NotificationRepository
+from repositories.sensor_repository import SensorRepository
 
 face_id_bp = Blueprint('face_id', __name__)
 logger = logging.getLogger('smart_home')
 
+# Repository'yi başlat
+notification_repository = None
+sensor_repository = None
+
+def init_repository(database, cache=None):
+    global notification_repository, sensor_repository
+    notification_repository = NotificationRepository(database)
+    sensor_repository = SensorRepository(database, cache)
+
+# Kare tanıma için process havuzu (utils.face_recognition_pool)
+face_recognition_pool = None
+FRAME_TIMEOUT = float(os.getenv('FACE_FRAME_TIMEOUT', '10'))
+MAX_BATCH_FRAMES = int(os.getenv('FACE_MAX_BATCH_FRAMES', '16'))
+
+def init_face_pool(pool):
+    """Kare tanıma havuzunu ayarlar."""
+    global face_recognition_pool
+    face_recognition_pool = pool
+
+# Yüz olaylarını ziyaretlerde gruplayan alarm motoru (utils.alert_engine)
+alert_engine = None
+
+def init_alert_engine(engine):
+    """Alarm motorunu ayarlar."""
+    global alert_engine
+    alert_engine = engine
+
+def save_face_result(device_id, recognized, timestamp, name=None):
+    """
+    Tanıma sonucunu cihazın face_id durumuna yazar ve bildirim kaydeder.
+    Alarm motoru varsa bildirim sadece yeni bir ziyarette ya da ziyaret
+    içinde yeni bir kişi tanındığında kaydedilir.
+
+    Returns:
+        dict: Kaydedilen face_id verisi
+    """
+    face_data = {
+        "recognized": recognized,
+        "timestamp": timestamp
+    }
+    if name:
+        face_data["name"] = name
+
+    # Sensör verisini güncelle (önbellekle birlikte, hemen yazılır)
+    sensor_repository.set_sensor_state(device_id, "face_id", face_data, critical=True)
+
+    if alert_engine is not None and not alert_engine.face_visits.observe(device_id, recognized, name)["notify"]:
+        return face_data
+    
+    # Bildirimi veritabanına kaydet (okunmamış sayacıyla birlikte)
+    notification_repository.save_notification(
+        title="Yüz Tanıma",
+        message=f"{device_id} cihazında yüz {'tanındı' if recognized else 'tanınmadı'}" + (f": {name}" if recognized and name else ""),
+        notification_type="face_recognition",
+        severity="info",
+        timestamp=timestamp
+    )
+    return face_data
+
 @face_id_bp.route('/face-recognition', methods=['POST'])
 def handle_face_recognition():
     """
@@ -16,7 +78,8 @@ def handle_face_recognition():
     {
         "device_id": "camera_1",
         "recognized": true,
-        "timestamp": "2024-05-23T01:46:30.870Z"
+        "timestamp": "2024-05-23T01:46:30.870Z",
+        "name": "ayse"  (opsiyonel)
     }
     """
     try:
@@ -59,26 +122,10 @@ def handle_face_recognition():
         device_id = data["device_id"]
         recognized = data["recognized"]
         timestamp = data.get("timestamp", datetime.now().isoformat())
+        name = data.get("name")
         
         # Firebase'e kaydet
-        ref = db.reference(f"sensors/{device_id}/face_id")
-        face_data = {
-            "recognized": recognized,
-            "timestamp": timestamp
-        }
-        
-        # Sensör verisini güncelle
-        ref.set(face_data)
-        
-        # Bildirimi veritabanına kaydet
-        notification_ref = db.reference("notifications")
-        notification_ref.push({
-            "title": "Yüz Tanıma",
-            "message": f"{device_id} cihazında yüz {'tanındı' if recognized else 'tanınmadı'}",
-            "type": "face_recognition",
-            "severity": "info",
-            "timestamp": timestamp
-        })
+        face_data = save_face_result(device_id, recognized, timestamp, name)
         
         logger.info(f"Face recognition verisi başarıyla kaydedildi: {face_data}")
         return jsonify({
@@ -91,4 +138,138 @@ def handle_face_recognition():
         return jsonify({
             "error": "Veri işlenirken hata oluştu",
             "details": str(e)
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+@face_id_bp.route('/face-recognition/frame', methods=['POST'])
+def recognize_frame():
+    """
+    Kameradan gelen JPEG karesinde yüz tanıma yapar.
+
+    Gövde ham JPEG baytlarıdır (Content-Type: image/jpeg) ya da multipart
+    "image" dosyasıdır. device_id query parametresi verilirse sonuç, ön
+    hesaplanmış sonuçlar gibi cihazın face_id durumuna da kaydedilir.
+
+    Response:
+    {
+        "recognized": true,
+        "name": "ayse",
+        "faces": [{"name": "ayse", "distance": 0.41, "location": [top, right, bottom, left]}],
+        "width": 1280,
+        "height": 720
+    }
+    """
+    try:
+        if face_recognition_pool is None:
+            return jsonify({
+                "error": "Yüz tanıma havuzu hazır değil",
+                "details": "Sunucu kare tanıma için yapılandırılmamış"
+            }), 503
+
+        image_file = request.files.get("image")
+        jpeg_bytes = image_file.read() if image_file else request.get_data()
+        if not jpeg_bytes:
+            return jsonify({
+                "error": "Geçersiz veri formatı",
+                "details": "JPEG görüntüsü gerekli"
+            }), 400
+
+        try:
+            result = face_recognition_pool.recognize(jpeg_bytes, timeout=FRAME_TIMEOUT)
+        except ValueError as e:
+            return jsonify({
+                "error": "Geçersiz görüntü",
+                "details": str(e)
+            }), 400
+        except FutureTimeoutError:
+            logger.error("Kare tanıma zaman aşımına uğradı")
+            return jsonify({
+                "error": "Kare tanıma zaman aşımına uğradı",
+                "details": f"{FRAME_TIMEOUT} saniye içinde sonuç alınamadı"
+            }), 504
+
+        recognized_faces = [face for face in result["faces"] if face["name"] != "unknown"]
+        best = min(recognized_faces, key=lambda face: face["distance"]) if recognized_faces else None
+        result["recognized"] = best is not None
+        result["name"] = best["name"] if best else None
+
+        device_id = request.args.get("device_id")
+        if device_id and result["faces"]:
+            save_face_result(device_id, result["recognized"], datetime.now().isoformat(), result["name"])
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.error(f"Kare tanıma sırasında hata: {str(e)}", exc_info=True)
+        return jsonify({
+            "error": "Kare işlenirken hata oluştu",
+            "details": str(e)
+        }), 500
+
+@face_id_bp.route('/face-recognition/frames', methods=['POST'])
+def recognize_frames():
+    """
+    Bir hareket olayı etrafında tamponlanmış birden fazla JPEG karesini tek
+    istekte tanır. Kareler multipart "images" dosyaları olarak gönderilir;
+    sonuçlar kare başına ve kareler arası birleşik kimlik olarak döner.
+
+    Response:
+    {
+        "frames": [{"width": 1280, "height": 720, "faces": [...]}],
+        "identity": {"name": "ayse", "votes": 3, "frames": 4, "distance": 0.42},
+        "recognized": true
+    }
+    """
+    try:
+        if face_recognition_pool is None:
+            return jsonify({
+                "error": "Yüz tanıma havuzu hazır değil",
+                "details": "Sunucu kare tanıma için yapılandırılmamış"
+            }), 503
+
+        jpeg_frames = [image_file.read() for image_file in request.files.getlist("images")]
+        jpeg_frames = [frame for frame in jpeg_frames if frame]
+        if not jpeg_frames:
+            return jsonify({
+                "error": "Geçersiz veri formatı",
+                "details": "En az bir JPEG görüntüsü (images) gerekli"
+            }), 400
+        if len(jpeg_frames) > MAX_BATCH_FRAMES:
+            return jsonify({
+                "error": "Geçersiz veri formatı",
+                "details": f"En fazla {MAX_BATCH_FRAMES} kare gönderilebilir"
+            }), 400
+
+        try:
+            result = face_recognition_pool.recognize_batch(jpeg_frames, timeout=FRAME_TIMEOUT)
+        except ValueError as e:
+            return jsonify({
+                "error": "Geçersiz görüntü",
+                "details": str(e)
+            }), 400
+        except FutureTimeoutError:
+            logger.error("Toplu kare tanıma zaman aşımına uğradı")
+            return jsonify({
+                "error": "Kare tanıma zaman aşımına uğradı",
+                "details": f"{FRAME_TIMEOUT} saniye içinde sonuç alınamadı"
+            }), 504
+
+        identity = result["identity"]
+        result["recognized"] = identity["name"] not in ("unknown", "not_detected")
+
+        device_id = request.args.get("device_id")
+        if device_id and identity["name"] != "not_detected":
+            save_face_result(
+                device_id,
+                result["recognized"],
+                datetime.now().isoformat(),
+                identity["name"] if result["recognized"] else None
+            )
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        logger.error(f"Toplu kare tanıma sırasında hata: {str(e)}", exc_info=True)
+        return jsonify({
+            "error": "Kareler işlenirken hata oluştu",
+            "details": str(e)
+        }), 500
@@ -0,0 +1,35 @@
+# routes/health.py: (liveness ve readiness kontrolleri)
+
+from flask import Blueprint, jsonify
+import time
+
+health_bp = Blueprint('health', __name__)
+
+# Alt sistem durumları (utils.readiness.ReadinessTracker)
+readiness = None
+
+def init_readiness(tracker):
+    """Readiness takipçisini ayarlar."""
+    global readiness
+    readiness = tracker
+
+@health_bp.route('/health/live', methods=['GET'])
+def liveness():
+    """Process ayakta ve istek karşılayabiliyor mu (dış bağımlılıklara bakmaz)."""
+    return jsonify({"status": "ok"}), 200
+
+@health_bp.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Zorunlu alt sistemler (örn. Firebase) hazır mı. Hazır değilse 503 döner;
+    Face ID gibi opsiyonel bileşenler sadece raporlanır.
+    """
+    if readiness is None:
+        return jsonify({"status": "starting", "components": {}}), 503
+
+    ready = readiness.is_ready()
+    return jsonify({
+        "status": "ready" if ready else "starting",
+        "uptime": round(time.time() - readiness.started_at, 3),
+        "components": readiness.snapshot()
+    }), 200 if ready else 503
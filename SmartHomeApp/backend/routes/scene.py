@@ -0,0 +1,254 @@
+# routes/scene.py: (sahneler ve toplu komutlar için)
+
+from flask import Blueprint, request, jsonify
+import logging
+import threading
+import time
+from repositories.command_repository import CommandRepository
+from routes.command import validate_command
+from utils.request_metrics import count_round_trip
+
+# Blueprint tanımlanıyor
+scene_bp = Blueprint('scene', __name__)
+
+# Global repository instance
+command_repository = None
+database = None
+# Opsiyonel komut birleştirici; doğrudan yazılan cihazların bekleyen komutları atılır
+command_coalescer = None
+
+# Tek istekte gönderilebilecek en fazla komut sayısı
+MAX_BATCH_COMMANDS = 50
+
+# Derlenmiş sahnelerin önbellekte kalma süresi (saniye); diğer worker'lardaki
+# sahne değişiklikleri en geç bu sürede görülür
+SCENE_CACHE_TTL = 300
+
+# Firebase'de "scenes/<ad>" yoksa kullanılan hazır sahneler
+DEFAULT_SCENES = {
+    "good_night": [
+        {"room": "yatak_odasi", "command_type": "light", "command": "off"},
+        {"room": "salon", "command_type": "light", "command": "off"},
+        {"room": "garaj", "command_type": "light", "command": "off"},
+        {"room": "banyo", "command_type": "light", "command": "off"},
+        {"room": "giris", "command_type": "light", "command": "off"},
+        {"room": "yatak_odasi", "command_type": "curtain", "command": "off"},
+        {"room": "garaj", "command_type": "door", "command": "off"}
+    ],
+    "good_morning": [
+        {"room": "yatak_odasi", "command_type": "curtain", "command": "on"},
+        {"room": "yatak_odasi", "command_type": "light", "command": "on"}
+    ]
+}
+
+# Sahne adı -> (derlenmiş komutlar ya da None, hatalar, derlenme zamanı);
+# bulunamayan ve geçersiz sahneler de aynı süreyle tutulur
+_compiled_scenes = {}
+_scenes_lock = threading.Lock()
+
+def init_repository(db_ref, cache=None, coalescer=None):
+    """Repository'yi başlat"""
+    global command_repository, database, command_coalescer
+    database = db_ref
+    command_repository = CommandRepository(db_ref, cache)
+    command_coalescer = coalescer
+    with _scenes_lock:
+        _compiled_scenes.clear()
+
+def compile_commands(items):
+    """
+    Komut listesini doğrulayıp (room, command_type, command) demetlerine çevirir.
+
+    Returns:
+        tuple: (demetler, hatalar); hatalar her geçersiz öğe için index içerir
+    """
+    if not isinstance(items, list) or not items:
+        return [], [{"error": "Komut listesi boş ya da geçersiz.", "details": "commands bir liste olmalı"}]
+    if len(items) > MAX_BATCH_COMMANDS:
+        return [], [{
+            "error": "Çok fazla komut.",
+            "details": f"Tek istekte en fazla {MAX_BATCH_COMMANDS} komut gönderilebilir."
+        }]
+
+    compiled = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not all(key in item for key in ("room", "command_type", "command")):
+            errors.append({
+                "index": index,
+                "error": "Komut bilgisi eksik.",
+                "details": "room, command_type ve command alanları gerekli"
+            })
+            continue
+        command, error = validate_command(item["room"], item["command_type"], item["command"])
+        if error:
+            errors.append(dict(error, index=index))
+            continue
+        compiled.append((item["room"], item["command_type"], command))
+    return compiled, errors
+
+def get_compiled_scene(name):
+    """
+    Sahneyi derlenmiş haliyle döner. Tanım Firebase'den (yoksa hazır
+    sahnelerden) bir kez okunup doğrulanır ve SCENE_CACHE_TTL boyunca
+    tekrar doğrulanmadan kullanılır. Sahne yoksa ya da tanımı geçersizse
+    bu sonuç da önbelleğe alınır; her istek Firebase'e gitmez.
+
+    Returns:
+        tuple: (demetler ya da sahne yoksa None, hatalar)
+    """
+    now = time.monotonic()
+    with _scenes_lock:
+        cached = _compiled_scenes.get(name)
+    if cached is not None and now - cached[2] < SCENE_CACHE_TTL:
+        return cached[0], cached[1]
+
+    count_round_trip()
+    definition = database.child(f"scenes/{name}").get()
+    if definition is None:
+        definition = DEFAULT_SCENES.get(name)
+    if definition is None:
+        compiled, errors = None, []
+    else:
+        if isinstance(definition, dict):
+            definition = definition.get("commands")
+        compiled, errors = compile_commands(definition)
+        if errors:
+            compiled = None
+    with _scenes_lock:
+        _compiled_scenes[name] = (compiled, errors, now)
+    return compiled, errors
+
+def _send_compiled(compiled):
+    if command_coalescer is not None:
+        command_coalescer.discard(compiled)
+    return command_repository.send_commands(compiled)
+
+def _command_results(compiled, written):
+    return [
+        {
+            "room": room,
+            "command_type": command_type,
+            "command": command,
+            "timestamp": command_data["timestamp"]
+        }
+        for (room, command_type, command), command_data in zip(compiled, written)
+    ]
+
+@scene_bp.route('/scenes/<name>', methods=['PUT'])
+def save_scene(name):
+    """
+    Bir sahne tanımını doğrulayıp kaydeder.
+
+    Request Body:
+        {
+            "commands": [{"room": "salon", "command_type": "light", "command": "off"}, ...]
+        }
+
+    Returns:
+        JSON formatında işlem sonucu
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        compiled, errors = compile_commands(data.get("commands"))
+        if errors:
+            return jsonify({
+                "error": "Geçersiz sahne tanımı.",
+                "details": errors
+            }), 400
+
+        definition = [
+            {"room": room, "command_type": command_type, "command": command}
+            for room, command_type, command in compiled
+        ]
+        count_round_trip()
+        database.child(f"scenes/{name}").set({"commands": definition})
+        with _scenes_lock:
+            _compiled_scenes[name] = (compiled, [], time.monotonic())
+
+        return jsonify({
+            "message": f"{name} sahnesi kaydedildi.",
+            "scene": name,
+            "commands": definition
+        }), 200
+
+    except Exception as e:
+        logging.error(f"Sahne kaydedilirken hata: {str(e)}")
+        return jsonify({
+            "error": "Sahne kaydedilirken hata oluştu.",
+            "details": str(e)
+        }), 500
+
+@scene_bp.route('/scenes/<name>/apply', methods=['POST'])
+def apply_scene(name):
+    """
+    Bir sahnedeki tüm komutları tek bir multi-path update ile uygular.
+
+    Returns:
+        JSON formatında uygulanan komutlar
+    """
+    try:
+        compiled, errors = get_compiled_scene(name)
+        if errors:
+            # Kayıtlı tanım bozuk: sunucu hatası değil, işlenemeyen veri
+            return jsonify({
+                "error": "Sahne tanımı geçersiz.",
+                "details": errors
+            }), 422
+        if compiled is None:
+            return jsonify({
+                "error": "Sahne bulunamadı.",
+                "details": f"'{name}' adında bir sahne yok."
+            }), 404
+
+        written = _send_compiled(compiled)
+
+        return jsonify({
+            "message": f"{name} sahnesi uygulandı.",
+            "scene": name,
+            "commands": _command_results(compiled, written)
+        }), 200
+
+    except Exception as e:
+        logging.error(f"Sahne uygulanırken hata: {str(e)}")
+        return jsonify({
+            "error": "Sahne uygulanırken hata oluştu.",
+            "details": str(e)
+        }), 500
+
+@scene_bp.route('/commands/batch', methods=['POST'])
+def send_batch_commands():
+    """
+    Birden fazla komutu tek bir multi-path update ile gönderir. Komutlardan
+    biri bile geçersizse hiçbiri gönderilmez.
+
+    Request Body:
+        {
+            "commands": [{"room": "salon", "command_type": "light", "command": "on"}, ...]
+        }
+
+    Returns:
+        JSON formatında gönderilen komutlar
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        compiled, errors = compile_commands(data.get("commands"))
+        if errors:
+            return jsonify({
+                "error": "Geçersiz komut listesi.",
+                "details": errors
+            }), 400
+
+        written = _send_compiled(compiled)
+
+        return jsonify({
+            "message": f"{len(compiled)} komut gönderildi.",
+            "commands": _command_results(compiled, written)
+        }), 200
+
+    except Exception as e:
+        logging.error(f"Toplu komut gönderilirken hata: {str(e)}")
+        return jsonify({
+            "error": "Toplu komut gönderilirken hata oluştu.",
+            "details": str(e)
+        }), 500
@@ -5,10 +5,11 @@ from firebase_admin import messaging
 from datetime import datetime
 import logging
 import os
+import threading
 from logging.handlers import RotatingFileHandler
 from repositories.sensor_repository import SensorRepository
 from repositories.notification_repository import NotificationRepository
-from utils.face_recognition_module import FaceRecognitionModule  # Face ID modülü aktif
+from utils.push_id import push_id_for_time
 
 # Logging yapılandırması
 log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
@@ -38,13 +39,37 @@ sensor_bp = Blueprint('sensor', __name__)
 sensor_repository = None
 notification_repository = None
 
-def init_repositories(database):
-    global sensor_repository, notification_repository
-    sensor_repository = SensorRepository(database)
-    notification_repository = NotificationRepository(database)
+sensor_history_repository = None
+notification_dispatcher = None
+alert_engine = None
 
-# Face ID modülünü başlat
-face_recognition = FaceRecognitionModule()  # Face ID modülü aktif
+def init_repositories(database, cache=None, write_buffer=None, history=None, dispatcher=None, alerts=None):
+    global sensor_repository, notification_repository, sensor_history_repository, notification_dispatcher, alert_engine
+    sensor_repository = SensorRepository(database, cache, write_buffer, history)
+    sensor_history_repository = history
+    notification_repository = NotificationRepository(database)
+    notification_dispatcher = dispatcher
+    alert_engine = alerts
+
+# Face ID modülü ilk kullanımda (ya da main.py'deki arka plan ısınmasında)
+# yüklenir; cv2/dlib importu ve galeri yüklemesi açılışı bekletmez
+face_recognition = None
+_face_recognition_lock = threading.Lock()
+
+def get_face_recognition():
+    """Face ID modülünü döner, henüz yüklenmediyse yükler."""
+    global face_recognition
+    with _face_recognition_lock:
+        if face_recognition is None:
+            from utils.face_recognition_module import FaceRecognitionModule
+            from utils.face_index import create_face_index
+            face_recognition = FaceRecognitionModule(
+                index=create_face_index(
+                    os.getenv('FACE_INDEX', 'exact'),
+                    nprobe=int(os.getenv('FACE_INDEX_NPROBE', '8'))
+                )
+            )  # Face ID modülü aktif
+    return face_recognition
 
 # Desteklenen sensör tipleri
 SENSOR_TYPES = {
@@ -92,9 +117,106 @@ SENSOR_TYPES = {
     }
 }
 
+# Oda -> sensör tipleri eşlemesi (katalogdan bir kez oluşturulur)
+ROOM_SENSOR_TYPES = {}
+for _sensor_type, _sensor_info in SENSOR_TYPES.items():
+    for _room in _sensor_info["rooms"]:
+        ROOM_SENSOR_TYPES.setdefault(_room, []).append(_sensor_type)
+
+def build_room_sensor_statuses(sensor_types, room_snapshot):
+    """
+    Bir odanın sensör listesini katalog ve anlık görüntüden bellekte oluşturur.
+    
+    Args:
+        sensor_types (list): Odadaki sensör tipleri
+        room_snapshot (dict): sensors/<room> altındaki veriler (yoksa None)
+        
+    Returns:
+        dict: sensor_type -> katalog bilgisi ve "status" alanı
+    """
+    room_snapshot = room_snapshot if isinstance(room_snapshot, dict) else {}
+    sensors = {}
+    for sensor_type in sensor_types:
+        # Katalog girdisini kopyala, global SENSOR_TYPES değiştirilmesin
+        sensor = dict(SENSOR_TYPES[sensor_type])
+        sensor_status = room_snapshot.get(sensor_type)
+        if sensor_status:
+            sensor["status"] = sensor_status
+        else:
+            sensor["status"] = {
+                "value": None,
+                "timestamp": None
+            }
+        sensors[sensor_type] = sensor
+    return sensors
+
+def validate_sensor_value(room, sensor_type, value):
+    """
+    Bir sensör okumasını sensör kataloğuna göre doğrular.
+    
+    Args:
+        room (str): Oda adı
+        sensor_type (str): Sensör tipi
+        value: Doğrulanacak değer
+        
+    Returns:
+        tuple: (dönüştürülmüş değer, hata) - geçerliyse hata None, değilse
+        "error" ve "details" alanlarını içeren bir dict
+    """
+    if sensor_type not in SENSOR_TYPES:
+        return None, {
+            "error": "Geçersiz sensör tipi.",
+            "details": f"Desteklenen sensörler: {', '.join(SENSOR_TYPES.keys())}"
+        }
+
+    sensor_info = SENSOR_TYPES[sensor_type]
+    if room not in sensor_info["rooms"]:
+        return None, {
+            "error": "Geçersiz oda-sensör kombinasyonu.",
+            "details": f"{sensor_type} sensörü {room} odasında bulunmuyor."
+        }
+
+    if sensor_info["type"] == "binary":
+        if value not in sensor_info["values"]:
+            return None, {
+                "error": "Geçersiz değer.",
+                "details": f"Desteklenen değerler: {', '.join(sensor_info['values'])}"
+            }
+    elif sensor_info["type"] == "float":
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None, {
+                "error": "Geçersiz değer formatı.",
+                "details": "Değer sayısal olmalıdır."
+            }
+        if not (sensor_info["range"][0] <= value <= sensor_info["range"][1]):
+            return None, {
+                "error": "Değer aralık dışında.",
+                "details": f"Değer {sensor_info['range'][0]} ile {sensor_info['range'][1]} arasında olmalıdır."
+            }
+    elif sensor_info["type"] == "integer":
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return None, {
+                "error": "Geçersiz değer formatı.",
+                "details": "Değer tam sayı olmalıdır."
+            }
+
+    return value, None
+
+def get_gas_severity(gas_level):
+    """Gaz seviyesinin katalogdaki kategorisini (low, medium, high) döner."""
+    for severity, (min_val, max_val) in SENSOR_TYPES["gas"]["severity"].items():
+        if min_val <= gas_level <= max_val:
+            return severity
+    return None
+
 def send_gas_alert_notification(gas_level, severity):
     """
-    Kritik gaz seviyesi durumunda bildirim gönderir.
+    Kritik gaz seviyesi durumunda bildirim gönderir. Dispatcher varsa
+    gönderim ve kayıt arka planda yapılır, istek beklemez.
     
     Args:
         gas_level (int): Gaz seviyesi
@@ -103,11 +225,14 @@ def send_gas_alert_notification(gas_level, severity):
     if severity != "high":
         return
 
+    title = "Gaz Alarmı!"
+    body = f"Gaz seviyesi kritik seviyede: {gas_level}\nLütfen hemen kontrol edin!"
+
     # Bildirim mesajını hazırla
     message = messaging.Message(
         notification=messaging.Notification(
-            title="Gaz Alarmı!",
-            body=f"Gaz seviyesi kritik seviyede: {gas_level}\nLütfen hemen kontrol edin!"
+            title=title,
+            body=body
         ),
         data={
             "severity": severity,
@@ -116,19 +241,24 @@ def send_gas_alert_notification(gas_level, severity):
         },
         topic="gas_alert"  # Mobilde bu topic'e abone olanlar alır
     )
+    record = {
+        "title": title,
+        "message": body,
+        "notification_type": "gas_alert",
+        "severity": severity,
+        "sensor_value": gas_level
+    }
+
+    if notification_dispatcher is not None:
+        notification_dispatcher.dispatch(message, record)
+        return
     
     try:
         response = messaging.send(message)
         logger.info(f"Bildirim başarıyla gönderildi: {response}")
         
         # Bildirimi veritabanına kaydet
-        notification_repository.save_notification(
-            title="Gaz Alarmı!",
-            message=f"Gaz seviyesi kritik seviyede: {gas_level}\nLütfen hemen kontrol edin!",
-            notification_type="gas_alert",
-            severity=severity,
-            sensor_value=gas_level
-        )
+        notification_repository.save_notification(**record)
     except Exception as e:
         logger.error(f"Bildirim gönderilirken hata oluştu: {str(e)}")
 
@@ -141,25 +271,13 @@ def get_all_sensors():
         JSON formatında sensör listesi
     """
     try:
-        # Oda bazlı sensör listesi oluştur
+        # Tüm sensörleri tek okumada al ve listeyi katalogdan oluştur
+        snapshot = sensor_repository.get_sensors_snapshot()
         room_sensors = {}
-        for sensor_type, sensor_info in SENSOR_TYPES.items():
-            for room in sensor_info["rooms"]:
-                if room not in room_sensors:
-                    room_sensors[room] = {"sensors": {}}
-                room_sensors[room]["sensors"][sensor_type] = sensor_info
-
-        # Her odanın sensörlerinin son durumlarını al
-        for room in room_sensors:
-            for sensor_name in room_sensors[room]["sensors"]:
-                sensor_status = sensor_repository.get_sensor_data(room, sensor_name)
-                if sensor_status:
-                    room_sensors[room]["sensors"][sensor_name]["status"] = sensor_status
-                else:
-                    room_sensors[room]["sensors"][sensor_name]["status"] = {
-                        "value": None,
-                        "timestamp": None
-                    }
+        for room, sensor_types in ROOM_SENSOR_TYPES.items():
+            room_sensors[room] = {
+                "sensors": build_room_sensor_statuses(sensor_types, snapshot.get(room))
+            }
 
         return jsonify({
             "message": "Tüm odaların sensör listesi başarıyla alındı.",
@@ -185,28 +303,15 @@ def get_room_sensors(room):
         JSON formatında sensör listesi
     """
     try:
-        # Odadaki sensörleri bul
-        room_sensors = {}
-        for sensor_type, sensor_info in SENSOR_TYPES.items():
-            if room in sensor_info["rooms"]:
-                room_sensors[sensor_type] = sensor_info
-
-        if not room_sensors:
+        if room not in ROOM_SENSOR_TYPES:
             return jsonify({
                 "error": "Geçersiz oda.",
-                "details": f"Desteklenen odalar: {', '.join(set([room for sensor in SENSOR_TYPES.values() for room in sensor['rooms']]))}"
+                "details": f"Desteklenen odalar: {', '.join(ROOM_SENSOR_TYPES.keys())}"
             }), 400
 
-        # Sensörlerin son durumlarını al
-        for sensor_name in room_sensors:
-            sensor_status = sensor_repository.get_sensor_data(room, sensor_name)
-            if sensor_status:
-                room_sensors[sensor_name]["status"] = sensor_status
-            else:
-                room_sensors[sensor_name]["status"] = {
-                    "value": None,
-                    "timestamp": None
-                }
+        # Odanın sensörlerini tek okumada al
+        snapshot = sensor_repository.get_sensors_snapshot(room)
+        room_sensors = build_room_sensor_statuses(ROOM_SENSOR_TYPES[room], snapshot)
 
         return jsonify({
             "message": f"{room} odasının sensör listesi başarıyla alındı.",
@@ -313,50 +418,29 @@ def update_sensor_data(room, sensor_type):
                 "details": "Request body'de 'value' alanı bulunmalıdır."
             }), 400
 
-        value = data['value']
-        sensor_info = SENSOR_TYPES[sensor_type]
-
         # Sensör tipine göre değer doğrulama
-        if sensor_info["type"] == "binary":
-            if value not in sensor_info["values"]:
-                return jsonify({
-                    "error": "Geçersiz değer.",
-                    "details": f"Desteklenen değerler: {', '.join(sensor_info['values'])}"
-                }), 400
-        elif sensor_info["type"] == "float":
-            try:
-                value = float(value)
-                if not (sensor_info["range"][0] <= value <= sensor_info["range"][1]):
-                    return jsonify({
-                        "error": "Değer aralık dışında.",
-                        "details": f"Değer {sensor_info['range'][0]} ile {sensor_info['range'][1]} arasında olmalıdır."
-                    }), 400
-            except ValueError:
-                return jsonify({
-                    "error": "Geçersiz değer formatı.",
-                    "details": "Değer sayısal olmalıdır."
-                }), 400
-        elif sensor_info["type"] == "integer":
-            try:
-                value = int(value)
-                # Gaz sensörü için özel kontrol
-                if sensor_type == "gas":
-                    severity = None
-                    for sev, (min_val, max_val) in sensor_info["severity"].items():
-                        if min_val <= value <= max_val:
-                            severity = sev
-                            break
-                    
-                    if severity == "high":
-                        send_gas_alert_notification(value, severity)
-            except ValueError:
-                return jsonify({
-                    "error": "Geçersiz değer formatı.",
-                    "details": "Değer tam sayı olmalıdır."
-                }), 400
-
-        # Sensör verisini güncelle
-        updated_data = sensor_repository.update_sensor_data(room, sensor_type, value)
+        value, error = validate_sensor_value(room, sensor_type, data['value'])
+        if error:
+            return jsonify(error), 400
+
+        # Gaz sensörü için özel kontrol
+        critical = False
+        if sensor_type == "gas":
+            severity = get_gas_severity(value)
+            if severity == "high":
+                critical = True
+            if alert_engine is not None:
+                # Histerezis: eşik etrafında dolaşan okumalar tek alarm üretir
+                alert_event = alert_engine.gas.update(room, value)
+                if alert_event in ("enter", "repeat"):
+                    send_gas_alert_notification(value, severity)
+                elif alert_event == "exit":
+                    logger.info(f"{room} gaz alarmı sona erdi: {value}")
+            elif severity == "high":
+                send_gas_alert_notification(value, severity)
+
+        # Sensör verisini güncelle (kritik okumalar tamponda bekletilmez)
+        updated_data = sensor_repository.update_sensor_data(room, sensor_type, value, critical=critical)
         
         return jsonify({
             "message": "Sensör verisi başarıyla güncellendi.",
@@ -372,19 +456,223 @@ def update_sensor_data(room, sensor_type):
             "details": str(e)
         }), 500
 
+def parse_history_time(value, default):
+    """Epoch saniye ya da ISO 8601 formatındaki zaman parametresini epoch saniyeye çevirir."""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+@sensor_bp.route('/sensor-data/<room>/<sensor_type>/history', methods=['GET'])
+def get_sensor_history(room, sensor_type):
+    """
+    Belirli bir odadaki sensörün geçmiş okumalarını yerel zaman serisinden döner.
+    Firebase'e istek yapılmaz.
+    
+    Args:
+        room (str): Oda adı
+        sensor_type (str): Sensör tipi
+        
+    Query Parameters:
+        from (float|str): Başlangıç, epoch saniye veya ISO 8601 (varsayılan: son 24 saat)
+        to (float|str): Bitiş, epoch saniye veya ISO 8601 (varsayılan: şimdi)
+        step (int): Saniye cinsinden kova genişliği; verilirse min/max/avg döner.
+            60, 3600 ve 86400 dakika/saat/gün özetlerinden okunur.
+        limit (int): Maksimum nokta sayısı (varsayılan: 5000)
+        
+    Returns:
+        JSON formatında zaman serisi
+    """
+    try:
+        if sensor_type not in SENSOR_TYPES:
+            return jsonify({
+                "error": "Geçersiz sensör tipi.",
+                "details": f"Desteklenen sensörler: {', '.join(SENSOR_TYPES.keys())}"
+            }), 400
+
+        if room not in SENSOR_TYPES[sensor_type]["rooms"]:
+            return jsonify({
+                "error": "Geçersiz oda-sensör kombinasyonu.",
+                "details": f"{sensor_type} sensörü {room} odasında bulunmuyor."
+            }), 400
+
+        if sensor_history_repository is None:
+            return jsonify({
+                "error": "Sensör geçmişi devre dışı.",
+                "details": "SENSOR_HISTORY_ENABLED ayarını kontrol edin."
+            }), 503
+
+        now = datetime.now().timestamp()
+        try:
+            end = parse_history_time(request.args.get('to'), now)
+            start = parse_history_time(request.args.get('from'), end - 24 * 3600)
+        except ValueError:
+            return jsonify({
+                "error": "Geçersiz zaman parametresi.",
+                "details": "from ve to epoch saniye veya ISO 8601 formatında olmalı."
+            }), 400
+
+        step = request.args.get('step', type=int)
+        if step is not None and step <= 0:
+            return jsonify({
+                "error": "Geçersiz step değeri.",
+                "details": "step pozitif bir tam sayı olmalı."
+            }), 400
+
+        limit = request.args.get('limit', default=5000, type=int)
+        points = sensor_history_repository.get_history(room, sensor_type, start, end, step, limit)
+
+        return jsonify({
+            "message": "Sensör geçmişi başarıyla alındı.",
+            "room": room,
+            "sensor_type": sensor_type,
+            "from": start,
+            "to": end,
+            "step": step,
+            "points": points
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Sensör geçmişi alınırken hata: {str(e)}")
+        return jsonify({
+            "error": "Sensör geçmişi alınırken hata oluştu.",
+            "details": str(e)
+        }), 500
+
+@sensor_bp.route('/sensors/bulk-update', methods=['POST'])
+def bulk_update_sensors():
+    """
+    Toplu sensör güncellemesi yapar.
+    
+    Tüm liste önce sensör kataloğuna göre doğrulanır; tek bir geçersiz öğe
+    varsa hiçbir şey yazılmaz. Geçerli listeler tek bir multi-path update
+    ve ortak bir zaman damgasıyla (ISO 8601) atomik olarak kaydedilir.
+    
+    Request Body:
+        {
+            "sensors": [
+                {
+                    "room": "salon",
+                    "type": "temperature",
+                    "value": 25.5
+                },
+                {
+                    "room": "salon",
+                    "type": "light",
+                    "value": "on"
+                }
+            ]
+        }
+        
+    Returns:
+        JSON formatında işlem sonucu ve öğe bazlı doğrulama sonuçları
+    """
+    try:
+        data = request.get_json()
+        if not data or "sensors" not in data:
+            return jsonify({
+                "error": "Geçersiz veri formatı.",
+                "details": "sensors alanı gerekli"
+            }), 400
+
+        sensors = data["sensors"]
+        if not isinstance(sensors, list):
+            return jsonify({
+                "error": "Geçersiz veri formatı.",
+                "details": "sensors bir liste olmalı"
+            }), 400
+
+        # Tüm listeyi yazmadan önce doğrula
+        readings = []
+        results = []
+        for index, sensor in enumerate(sensors):
+            if not isinstance(sensor, dict) or not all(key in sensor for key in ["room", "type", "value"]):
+                results.append({
+                    "index": index,
+                    "valid": False,
+                    "error": "Geçersiz sensör verisi.",
+                    "details": "Her sensör room, type ve value alanlarını içermeli"
+                })
+                continue
+
+            value, error = validate_sensor_value(sensor["room"], sensor["type"], sensor["value"])
+            result = {
+                "index": index,
+                "room": sensor["room"],
+                "type": sensor["type"],
+                "valid": error is None
+            }
+            if error:
+                result.update(error)
+            else:
+                result["value"] = value
+                readings.append((sensor["room"], sensor["type"], value))
+            results.append(result)
+
+        if len(readings) != len(sensors):
+            return jsonify({
+                "error": "Geçersiz sensör verisi.",
+                "details": "Liste doğrulanamadı, hiçbir sensör güncellenmedi.",
+                "results": results
+            }), 400
+
+        # Tüm sensörleri tek round trip ile yaz
+        sensor_repository.bulk_update_sensor_data(readings)
+
+        return jsonify({
+            "message": "Sensörler başarıyla güncellendi.",
+            "updated_sensors": len(readings),
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Toplu sensör güncellemesi sırasında hata: {str(e)}")
+        return jsonify({
+            "error": "Sensörler güncellenirken hata oluştu.",
+            "details": str(e)
+        }), 500
+
 @sensor_bp.route('/notifications', methods=['GET'])
 def get_notifications():
     """
-    Tüm bildirimleri listeler.
+    Bildirimleri en yeniden eskiye sayfalı listeler.
+    
+    Query Parameters:
+        limit (int): Sayfa boyutu (varsayılan 20, en fazla 100)
+        before (str): Önceki yanıttaki next_before imleci
+        type (str): Bildirim tipi filtresi (örn. gas_alert)
+        severity (str): Önem filtresi (örn. high)
     
     Returns:
-        JSON formatında bildirim listesi
+        JSON formatında bildirim listesi, sonraki sayfa imleci ve okunmamış sayısı
     """
     try:
-        notifications = notification_repository.get_all_notifications()
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({
+                "error": "Geçersiz limit değeri.",
+                "details": "limit bir tam sayı olmalıdır."
+            }), 400
+        if not 1 <= limit <= 100:
+            return jsonify({
+                "error": "Geçersiz limit değeri.",
+                "details": "limit 1 ile 100 arasında olmalıdır."
+            }), 400
+
+        page = notification_repository.get_notifications(
+            limit=limit,
+            before=request.args.get('before'),
+            notification_type=request.args.get('type'),
+            severity=request.args.get('severity')
+        )
         return jsonify({
             "message": "Bildirimler başarıyla alındı.",
-            "notifications": notifications
+            "notifications": page["notifications"],
+            "next_before": page["next_before"],
+            "unread_count": notification_repository.get_unread_count()
         }), 200
     except Exception as e:
         logger.error(f"Bildirimler alınırken hata: {str(e)}")
@@ -393,6 +681,104 @@ def get_notifications():
             "details": str(e)
         }), 500
 
+@sensor_bp.route('/notifications/unread-count', methods=['GET'])
+def get_unread_notification_count():
+    """
+    Okunmamış bildirim sayısını döner (uygulama rozeti için tek okuma).
+    
+    Returns:
+        JSON formatında okunmamış bildirim sayısı
+    """
+    try:
+        return jsonify({
+            "unread_count": notification_repository.get_unread_count()
+        }), 200
+    except Exception as e:
+        logger.error(f"Okunmamış bildirim sayısı alınırken hata: {str(e)}")
+        return jsonify({
+            "error": "Okunmamış bildirim sayısı alınırken hata oluştu.",
+            "details": str(e)
+        }), 500
+
+# Toplu bildirim işlemlerinde tek istekte kabul edilen en fazla ID sayısı
+MAX_BULK_NOTIFICATION_IDS = 500
+
+@sensor_bp.route('/notifications/bulk', methods=['POST'])
+def bulk_notification_action():
+    """
+    Birden fazla bildirim üzerinde tek round trip ile işlem yapar.
+    
+    Request Body:
+        {"action": "mark_read", "ids": ["-Nx...", "-Ny..."]}
+        {"action": "delete", "ids": ["-Nx...", "-Ny..."]}
+        {"action": "mark_all_read_before", "before": "-Nz..."}
+        {"action": "mark_all_read_before", "before_time": "2024-05-23T01:46:30"}
+    
+    Returns:
+        JSON formatında işlem sonucu ve etkilenen bildirim sayısı
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or "action" not in data:
+            return jsonify({
+                "error": "Geçersiz veri formatı.",
+                "details": "action alanı gerekli"
+            }), 400
+
+        action = data["action"]
+        if action in ("mark_read", "delete"):
+            notification_ids = data.get("ids")
+            if not isinstance(notification_ids, list) or not all(isinstance(i, str) and i for i in notification_ids):
+                return jsonify({
+                    "error": "Geçersiz veri formatı.",
+                    "details": "ids bildirim ID'lerinden oluşan bir liste olmalı"
+                }), 400
+            if len(notification_ids) > MAX_BULK_NOTIFICATION_IDS:
+                return jsonify({
+                    "error": "Geçersiz veri formatı.",
+                    "details": f"Tek istekte en fazla {MAX_BULK_NOTIFICATION_IDS} bildirim işlenebilir"
+                }), 400
+            if action == "mark_read":
+                affected = notification_repository.mark_many_as_read(notification_ids)
+            else:
+                affected = notification_repository.delete_many(notification_ids)
+
+        elif action == "mark_all_read_before":
+            before = data.get("before")
+            if before is None and data.get("before_time") is not None:
+                try:
+                    before = push_id_for_time(int(parse_history_time(str(data["before_time"]), None) * 1000))
+                except ValueError:
+                    return jsonify({
+                        "error": "Geçersiz zaman formatı.",
+                        "details": "before_time epoch saniye ya da ISO 8601 olmalıdır."
+                    }), 400
+            if not isinstance(before, str) or not before:
+                return jsonify({
+                    "error": "Geçersiz veri formatı.",
+                    "details": "before ya da before_time alanı gerekli"
+                }), 400
+            affected = notification_repository.mark_all_read_before(before)
+
+        else:
+            return jsonify({
+                "error": "Geçersiz işlem.",
+                "details": "Desteklenen işlemler: mark_read, delete, mark_all_read_before"
+            }), 400
+
+        return jsonify({
+            "message": "Toplu bildirim işlemi başarıyla tamamlandı.",
+            "action": action,
+            "affected": affected
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Toplu bildirim işlemi sırasında hata: {str(e)}")
+        return jsonify({
+            "error": "Toplu bildirim işlemi sırasında hata oluştu.",
+            "details": str(e)
+        }), 500
+
 @sensor_bp.route('/notifications/<notification_id>', methods=['DELETE'])
 def delete_notification(notification_id):
     """
@@ -1,11 +1,19 @@
 # routes/status.py : (cihazların son durumunu verir)
 
 from flask import Blueprint, jsonify
-from firebase_admin import db
+from repositories.command_repository import CommandRepository
 
 # Blueprint tanımlanıyor
 status_bp = Blueprint('status', __name__)
 
+# Global repository instance
+command_repository = None
+
+def init_repository(database, cache=None):
+    """Repository'yi başlat"""
+    global command_repository
+    command_repository = CommandRepository(database, cache)
+
 # /status/<oda> endpointi
 @status_bp.route('/status/<room>', methods=['GET'])
 def get_room_status(room):
@@ -13,11 +21,9 @@ def get_room_status(room):
     Belirli bir odadaki cihazların son durumunu verir.
     """
     try:
-        ref_path = f"commands/{room}"
-        room_ref = db.reference(ref_path)
-        room_data = room_ref.get()
+        room_data = command_repository.get_room_commands(room)
 
-        if room_data is None:
+        if not room_data:
             return jsonify({"error": f"'{room}' odası için veri bulunamadı."}), 404
 
         return jsonify(room_data), 200
@@ -0,0 +1,128 @@
+# routes/stream.py: (odaların canlı durumu için Server-Sent Events akışı)
+
+from flask import Blueprint, Response, request, jsonify
+import json
+import logging
+from utils.state_cache import read_subtree_through
+
+# Blueprint tanımlanıyor
+stream_bp = Blueprint('stream', __name__)
+
+# Global hub ve veritabanı
+event_hub = None
+database = None
+state_cache = None
+
+# Olay gelmezse bağlantıyı canlı tutmak için yorum satırı aralığı (saniye)
+HEARTBEAT_INTERVAL = 15
+
+# Bağlanınca ilk durumu gönderilen alt ağaçlar
+SNAPSHOT_ROOTS = ("sensors", "commands")
+
+def init_event_hub(hub, db_ref, cache=None):
+    """Hub'ı başlat"""
+    global event_hub, database, state_cache
+    event_hub = hub
+    database = db_ref
+    state_cache = cache
+
+def format_event(event_type, data, event_id=None):
+    """Bir SSE mesajı oluşturur."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+def _snapshot_events(rooms):
+    # Önbellekten (yoksa oda başına tek okumayla) ilk durum
+    for room in rooms:
+        snapshot = {"room": room}
+        for root in SNAPSHOT_ROOTS:
+            snapshot[root] = read_subtree_through(database, state_cache, f"{root}/{room}")
+        yield format_event("snapshot", snapshot)
+
+def _event_stream(subscription, rooms, last_event_id=None):
+    try:
+        send_snapshot = True
+        if last_event_id is not None:
+            # Kaçırılan olaylar geçmişte varsa snapshot gerekmez
+            send_snapshot = not event_hub.replay(subscription, last_event_id)
+
+        # Tamponlayan proxy'ler akışı hemen iletsin
+        yield ": connected\n\n"
+        if send_snapshot:
+            yield from _snapshot_events(rooms)
+        while True:
+            events, overflowed = subscription.get(timeout=HEARTBEAT_INTERVAL)
+            if overflowed:
+                # İstemci yetişemedi: atılan olaylar yerine durumu yeniden okumalı
+                yield format_event("resync", {"rooms": rooms})
+            if not events:
+                yield ": heartbeat\n\n"
+                continue
+            for event in events:
+                yield format_event("change", {"path": event["path"], "value": event["value"]}, event["id"])
+    finally:
+        event_hub.unsubscribe(subscription)
+
+@stream_bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    Odalardaki sensör ve komut değişikliklerini SSE olarak yayınlar.
+
+    Query Parameters:
+        rooms (str): Virgülle ayrılmış oda listesi (örn. "salon,garaj")
+
+    Olaylar:
+        snapshot: Bağlanınca oda başına ilk durum
+        change: {"path": "sensors/salon/gas", "value": {...}}
+        resync: İstemci olayları kaçırdı, durumu yeniden okumalı
+    """
+    try:
+        if event_hub is None:
+            return jsonify({
+                "error": "Canlı akış kullanılamıyor.",
+                "details": "Olay hub'ı başlatılmadı"
+            }), 503
+
+        rooms = [room.strip() for room in request.args.get('rooms', '').split(',') if room.strip()]
+        if not rooms:
+            return jsonify({
+                "error": "Oda bilgisi eksik.",
+                "details": "rooms parametresi gerekli (örn. rooms=salon,garaj)"
+            }), 400
+
+        # Sınır hub'da atomik olarak uygulanır (her akış bir worker thread'i tutar)
+        subscription = event_hub.subscribe(rooms)
+        if subscription is None:
+            return jsonify({
+                "error": "Çok fazla açık akış.",
+                "details": f"En fazla {event_hub.max_subscribers} akış açık tutulabilir."
+            }), 503
+
+        last_event_id = request.headers.get('Last-Event-ID')
+        try:
+            last_event_id = int(last_event_id) if last_event_id is not None else None
+        except ValueError:
+            last_event_id = None
+
+        response = Response(
+            _event_stream(subscription, rooms, last_event_id),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        # Akış hiç başlamasa da yanıt kapanınca abonelik bırakılır
+        response.call_on_close(lambda: event_hub.unsubscribe(subscription))
+        return response
+
+    except Exception as e:
+        logging.error(f"Canlı akış başlatılırken hata: {str(e)}")
+        return jsonify({
+            "error": "Canlı akış başlatılırken hata oluştu.",
+            "details": str(e)
+        }), 500
@@ -0,0 +1,110 @@
+import pytest
+from utils.alert_engine import HysteresisAlert, VisitTracker
+
+
+def test_hysteresis_enters_at_threshold_and_exits_below_exit_threshold():
+    alert = HysteresisAlert(enter_threshold=300, exit_threshold=200, min_interval=60)
+
+    assert alert.update("salon", 299, now=0) is None
+    assert alert.update("salon", 300, now=1) == "enter"
+    assert alert.is_active("salon")
+
+    # Eşikler arası değerler alarmı sürdürür
+    assert alert.update("salon", 250, now=2) is None
+    assert alert.update("salon", 200, now=3) is None
+    assert alert.is_active("salon")
+
+    assert alert.update("salon", 199, now=4) == "exit"
+    assert not alert.is_active("salon")
+
+
+def test_hysteresis_repeats_only_after_cooldown():
+    alert = HysteresisAlert(enter_threshold=300, exit_threshold=200, min_interval=60)
+
+    assert alert.update("salon", 400, now=0) == "enter"
+    assert alert.update("salon", 400, now=30) is None
+    assert alert.update("salon", 400, now=60) == "repeat"
+    assert alert.update("salon", 400, now=90) is None
+    # Eşikler arasındaki değer cooldown dolsa da hatırlatma üretmez
+    assert alert.update("salon", 250, now=200) is None
+    assert alert.update("salon", 400, now=201) == "repeat"
+
+
+def test_hysteresis_rearms_after_exit_and_cooldown():
+    alert = HysteresisAlert(enter_threshold=300, exit_threshold=200, min_interval=60)
+
+    assert alert.update("salon", 350, now=0) == "enter"
+    assert alert.update("salon", 100, now=10) == "exit"
+
+    # Cooldown içinde tekrar girmek bildirim üretmez ama alarm durumuna geçer
+    assert alert.update("salon", 350, now=20) is None
+    assert alert.is_active("salon")
+    assert alert.update("salon", 100, now=30) == "exit"
+
+    assert alert.update("salon", 350, now=61) == "enter"
+
+
+def test_hysteresis_tracks_sources_independently():
+    alert = HysteresisAlert(enter_threshold=300, exit_threshold=200, min_interval=60)
+
+    assert alert.update("salon", 350, now=0) == "enter"
+    assert alert.update("mutfak", 350, now=1) == "enter"
+    assert alert.update("salon", 100, now=2) == "exit"
+    assert alert.is_active("mutfak")
+    assert not alert.is_active("salon")
+
+
+def test_hysteresis_rejects_exit_above_enter():
+    with pytest.raises(ValueError):
+        HysteresisAlert(enter_threshold=200, exit_threshold=300)
+
+
+def test_visit_notifies_once_per_person_within_a_visit():
+    tracker = VisitTracker(gap=60)
+
+    first = tracker.observe("camera_1", True, "ali", now=0)
+    assert first["notify"] and first["new_visit"]
+
+    assert not tracker.observe("camera_1", True, "ali", now=10)["notify"]
+    second_person = tracker.observe("camera_1", True, "ayse", now=20)
+    assert second_person["notify"] and not second_person["new_visit"]
+    assert second_person["visit"]["names"] == ["ali", "ayse"]
+    assert second_person["visit"]["events"] == 3
+
+
+def test_visit_unknown_face_only_notifies_on_new_visit():
+    tracker = VisitTracker(gap=60)
+
+    assert tracker.observe("camera_1", False, now=0)["notify"]
+    assert not tracker.observe("camera_1", False, now=10)["notify"]
+
+    tracker = VisitTracker(gap=60)
+    assert tracker.observe("camera_1", True, "ali", now=0)["notify"]
+    assert not tracker.observe("camera_1", False, now=10)["notify"]
+
+
+def test_visit_recognized_after_unknown_still_notifies():
+    tracker = VisitTracker(gap=60)
+
+    assert tracker.observe("camera_1", False, now=0)["notify"]
+    assert tracker.observe("camera_1", True, "ali", now=5)["notify"]
+
+
+def test_visit_starts_again_after_gap():
+    tracker = VisitTracker(gap=60)
+
+    assert tracker.observe("camera_1", True, "ali", now=0)["notify"]
+    # Olaylar son görülme anından itibaren ziyareti uzatır
+    assert not tracker.observe("camera_1", True, "ali", now=50)["notify"]
+    assert not tracker.observe("camera_1", True, "ali", now=100)["notify"]
+
+    again = tracker.observe("camera_1", True, "ali", now=161)
+    assert again["notify"] and again["new_visit"]
+    assert again["visit"]["events"] == 1
+
+
+def test_visits_are_tracked_per_device():
+    tracker = VisitTracker(gap=60)
+
+    assert tracker.observe("camera_1", True, "ali", now=0)["notify"]
+    assert tracker.observe("camera_2", True, "ali", now=1)["notify"]
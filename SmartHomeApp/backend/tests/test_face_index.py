@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from utils.face_index import ENCODING_SIZE, ExactFaceIndex, IVFFaceIndex, create_face_index
+
+# face_recognition kütüphanesinin varsayılan eşleşme eşiği
+TOLERANCE = 0.6
+
+
+@pytest.fixture
+def gallery():
+    # 40 kişi, kişi başına 5 kodlama; kişiler arası uzaklık ~1.6, kişi içi ~0.16
+    rng = np.random.default_rng(42)
+    centers = rng.normal(0.0, 0.1, (40, ENCODING_SIZE)).astype(np.float32)
+    vectors = np.repeat(centers, 5, axis=0) + rng.normal(0.0, 0.01, (200, ENCODING_SIZE)).astype(np.float32)
+    labels = [f"person_{i}" for i in range(40) for _ in range(5)]
+    near = centers + rng.normal(0.0, 0.01, centers.shape).astype(np.float32)
+    far = rng.normal(0.0, 0.1, (10, ENCODING_SIZE)).astype(np.float32)
+    return {"vectors": vectors, "labels": labels, "near": near, "far": far}
+
+
+def brute_force(queries, vectors, labels):
+    distances = np.linalg.norm(queries[:, None, :] - vectors[None, :, :], axis=2)
+    best = np.argmin(distances, axis=1)
+    return [labels[i] for i in best], distances[np.arange(len(queries)), best]
+
+
+def build(index, gallery):
+    index.build(gallery["vectors"], gallery["labels"])
+    return index
+
+
+def test_exact_index_matches_brute_force(gallery):
+    index = build(ExactFaceIndex(), gallery)
+    queries = np.concatenate([gallery["near"], gallery["far"]])
+
+    labels, distances = index.search(queries)
+    expected_labels, expected_distances = brute_force(queries, gallery["vectors"], gallery["labels"])
+
+    assert labels == expected_labels
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-4, atol=1e-4)
+
+
+def test_ivf_top1_agrees_with_exact(gallery):
+    exact = build(ExactFaceIndex(), gallery)
+    ivf = build(IVFFaceIndex(nlist=8, nprobe=3, seed=0), gallery)
+
+    exact_labels, exact_distances = exact.search(gallery["near"])
+    ivf_labels, ivf_distances = ivf.search(gallery["near"])
+
+    assert ivf_labels == exact_labels
+    np.testing.assert_allclose(ivf_distances, exact_distances, rtol=1e-4, atol=1e-4)
+
+
+def test_ivf_with_all_lists_probed_equals_exact(gallery):
+    exact = build(ExactFaceIndex(), gallery)
+    ivf = build(IVFFaceIndex(nlist=8, nprobe=8, seed=0), gallery)
+    queries = np.concatenate([gallery["near"], gallery["far"]])
+
+    exact_labels, exact_distances = exact.search(queries)
+    ivf_labels, ivf_distances = ivf.search(queries)
+
+    assert ivf_labels == exact_labels
+    np.testing.assert_allclose(ivf_distances, exact_distances, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("kind, options", [("exact", {}), ("ivf", {"nlist": 8, "nprobe": 3, "seed": 0})])
+def test_distance_threshold_separates_known_and_unknown(gallery, kind, options):
+    index = build(create_face_index(kind, **options), gallery)
+
+    _, near_distances = index.search(gallery["near"])
+    _, far_distances = index.search(gallery["far"])
+
+    assert np.all(near_distances <= TOLERANCE)
+    # Yaklaşık arama uzaklığı hiçbir zaman gerçek en yakın uzaklıktan küçük olamaz
+    _, exact_far = brute_force(gallery["far"], gallery["vectors"], gallery["labels"])
+    assert np.all(far_distances >= exact_far - 1e-4)
+    assert np.all(far_distances > TOLERANCE)
+
+
+@pytest.mark.parametrize("index_factory", [ExactFaceIndex, lambda: IVFFaceIndex(nlist=8, nprobe=8, seed=0)])
+def test_add_and_remove_without_rebuild(gallery, index_factory):
+    index = build(index_factory(), gallery)
+    newcomer = np.full(ENCODING_SIZE, 0.5, dtype=np.float32)
+
+    index.add("newcomer", newcomer)
+    labels, distances = index.search(newcomer[None, :])
+    assert labels == ["newcomer"]
+    assert distances[0] == pytest.approx(0.0, abs=1e-3)
+
+    assert index.remove("person_0") == 5
+    labels, _ = index.search(gallery["near"][:1])
+    assert labels[0] != "person_0"
+    assert len(index) == len(gallery["labels"]) - 5 + 1
+
+
+def test_empty_index_returns_no_match():
+    for index in (ExactFaceIndex(), IVFFaceIndex()):
+        labels, distances = index.search(np.zeros((2, ENCODING_SIZE), dtype=np.float32))
+        assert labels == [None, None]
+        assert np.all(np.isinf(distances))
@@ -0,0 +1,116 @@
+# utils/alert_engine.py: (gaz ve yüz tanıma alarmları için histerezis ve debounce)
+
+import threading
+import time
+
+
+class HysteresisAlert:
+    """
+    Kaynak (örn. oda) başına eşik alarmı durum makinesi.
+
+    Değer enter_threshold'a ulaşınca alarm durumuna girilir ve bildirim
+    gönderilir; değer exit_threshold'un altına inene kadar alarmda kalınır.
+    Alarm sürerken en fazla min_interval saniyede bir hatırlatma yapılır;
+    kısa süre içinde çıkıp tekrar girmek de yeni bildirim üretmez.
+    """
+
+    def __init__(self, enter_threshold, exit_threshold, min_interval=300.0):
+        if exit_threshold > enter_threshold:
+            raise ValueError("exit_threshold enter_threshold'dan büyük olamaz")
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_interval = min_interval
+        self._states = {}  # kaynak -> {"active", "last_alert", "peak"}
+        self._lock = threading.Lock()
+
+    def update(self, source, value, now=None):
+        """
+        Yeni bir okumayı işler.
+
+        Returns:
+            str: "enter" (yeni alarm), "repeat" (süren alarm hatırlatması),
+            "exit" (alarm bitti) ya da bildirim gerekmiyorsa None
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            state = self._states.setdefault(source, {"active": False, "last_alert": None, "peak": None})
+            if not state["active"]:
+                if value < self.enter_threshold:
+                    return None
+                state["active"] = True
+                state["peak"] = value
+                if self._suppressed(state, now):
+                    return None
+                state["last_alert"] = now
+                return "enter"
+
+            if value < self.exit_threshold:
+                state["active"] = False
+                state["peak"] = None
+                return "exit"
+
+            state["peak"] = max(state["peak"], value)
+            # Eşikler arasındaki değerler alarmı sürdürür ama hatırlatma üretmez
+            if value < self.enter_threshold or self._suppressed(state, now):
+                return None
+            state["last_alert"] = now
+            return "repeat"
+
+    def _suppressed(self, state, now):
+        return state["last_alert"] is not None and now - state["last_alert"] < self.min_interval
+
+    def is_active(self, source):
+        """Kaynak şu an alarm durumunda mı."""
+        with self._lock:
+            state = self._states.get(source)
+            return bool(state and state["active"])
+
+
+class VisitTracker:
+    """
+    Cihaz başına yüz tanıma olaylarını "ziyaret" oturumlarında gruplar.
+
+    Bir cihazda gap saniyeden uzun sessizlikten sonra gelen ilk olay yeni bir
+    ziyaret başlatır ve bildirilir. Ziyaret boyunca sadece daha önce
+    görülmemiş bir kişinin tanınması yeni bildirim üretir; aynı kişinin
+    tekrar eden kare sonuçları bildirim üretmez.
+    """
+
+    def __init__(self, gap=60.0):
+        self.gap = gap
+        self._visits = {}  # cihaz -> {"started_at", "last_seen", "names", "events"}
+        self._lock = threading.Lock()
+
+    def observe(self, device_id, recognized, name=None, now=None):
+        """
+        Bir tanıma olayını ziyarete ekler.
+
+        Returns:
+            dict: {"notify", "new_visit", "visit"}; visit ziyaretin kopyasıdır
+        """
+        if now is None:
+            now = time.time()
+        key = name if recognized and name else ("recognized" if recognized else "unknown")
+        with self._lock:
+            visit = self._visits.get(device_id)
+            new_visit = visit is None or now - visit["last_seen"] > self.gap
+            if new_visit:
+                visit = {"started_at": now, "last_seen": now, "names": [], "events": 0}
+                self._visits[device_id] = visit
+            visit["last_seen"] = now
+            visit["events"] += 1
+
+            # Bilinmeyen yüzden sonra tanınan biri gelirse yine bildirilir
+            notify = key not in visit["names"] and (new_visit or key != "unknown")
+            if key not in visit["names"]:
+                visit["names"].append(key)
+            return {"notify": notify, "new_visit": new_visit, "visit": dict(visit, names=list(visit["names"]))}
+
+
+class AlertEngine:
+    """Gaz histerezisi ve yüz ziyaretleri için ortak alarm motoru."""
+
+    def __init__(self, gas_enter_threshold, gas_exit_threshold, gas_min_interval=300.0, face_visit_gap=60.0):
+        self.gas = HysteresisAlert(gas_enter_threshold, gas_exit_threshold, gas_min_interval)
+        self.face_visits = VisitTracker(face_visit_gap)
@@ -0,0 +1,153 @@
+# utils/command_coalescer.py: (hızlı art arda gelen komutlar için cihaz başına birleştirme)
+
+import logging
+import threading
+import time
+from utils.firebase_values import local_timestamp_ms
+
+logger = logging.getLogger(__name__)
+
+
+class CommandCoalescer:
+    """
+    Aynı cihaza (oda + komut tipi) kısa aralıklarla gelen komutları son
+    istenen duruma indirger.
+
+    Bir cihaza gelen ilk komut window kadar bekletilir; pencere içinde gelen
+    her yeni komut değeri değiştirir ve pencereyi yeniden başlatır. Sürekli
+    basılan bir anahtar yazmayı sonsuza kadar ertelemesin diye bekleme ilk
+    komuttan itibaren max_delay ile sınırlıdır. Süresi dolan tüm cihazlar tek
+    bir send_commands çağrısıyla yazılır: cihaz başına bir durum yazması ve
+    coalesced_count taşıyan bir geçmiş kaydı.
+    """
+
+    def __init__(self, command_repository, window_ms=300, max_delay_ms=None):
+        self.repository = command_repository
+        self.window = window_ms / 1000.0
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else window_ms * 4) / 1000.0
+        self._pending = {}  # (room, command_type) -> {"command", "count", "first", "deadline"}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Flush'lar sıralı yapılır, eski bir değer yenisinin üzerine yazılmasın
+        self._flush_lock = threading.Lock()
+        self._running = True
+        self.submitted = 0
+        self.written = 0
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._run, name="command-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, room, command_type, command):
+        """
+        Doğrulanmış bir komutu birleştirme kuyruğuna ekler.
+
+        Returns:
+            dict: İstenen durum (yerel zaman damgasıyla), "pending" ve o ana
+            kadar birleştirilen komut sayısı
+        """
+        key = (room, command_type)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = {"command": command, "count": 1, "first": now, "deadline": now + self.window}
+                self._pending[key] = entry
+            else:
+                entry["command"] = command
+                entry["count"] += 1
+                entry["deadline"] = min(now + self.window, entry["first"] + self.max_delay)
+            count = entry["count"]
+            self.submitted += 1
+            self._wakeup.notify()
+
+        command_data = {"value": command, "timestamp": local_timestamp_ms()}
+        if self.repository.cache is not None:
+            # Durum okumaları bekleyen son değeri görsün
+            self.repository.cache.put(f"commands/{room}/{command_type}", command_data)
+        if not self._running:
+            self.flush()
+        return dict(command_data, pending=True, coalesced_count=count)
+
+    def discard(self, commands):
+        """
+        Verilen cihazların bekleyen komutlarını atar; sahne ve toplu komutlar
+        doğrudan yazılırken eski bir dokunuşun sonradan üzerine yazmaması için.
+
+        Args:
+            commands (list): (room, command_type, ...) demetleri
+        """
+        with self._lock:
+            for item in commands:
+                self._pending.pop((item[0], item[1]), None)
+
+    def flush(self, due_only=False):
+        """Bekleyen (due_only ise sadece süresi dolan) komutları tek seferde yazar."""
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                keys = [key for key, entry in self._pending.items() if not due_only or entry["deadline"] <= now]
+                batch = [(key, self._pending.pop(key)) for key in keys]
+            if not batch:
+                return 0
+            try:
+                self.repository.send_commands(
+                    [(room, command_type, entry["command"]) for (room, command_type), entry in batch],
+                    coalesced_counts=[entry["count"] for _, entry in batch]
+                )
+            except Exception as e:
+                logger.error(f"Birleştirilmiş komutlar gönderilirken hata: {str(e)}")
+                with self._lock:
+                    for key, entry in batch:
+                        newer = self._pending.get(key)
+                        if newer is not None:
+                            # Bu arada gelen daha yeni komut geçerli, sayılar toplanır
+                            newer["count"] += entry["count"]
+                        else:
+                            entry["deadline"] = time.monotonic() + self.window
+                            self._pending[key] = entry
+                raise
+            self.written += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def stop(self):
+        """Arka plan thread'ini durdurur ve bekleyen komutları yazar."""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Birleştirme istatistiklerini döner."""
+        with self._lock:
+            return {
+                "window_ms": int(self.window * 1000),
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "written": self.written,
+                "flushes": self.flushes
+            }
+
+    def _next_deadline(self):
+        # Kilit tutulurken çağrılır
+        if not self._pending:
+            return None
+        return min(entry["deadline"] for entry in self._pending.values())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._running and (self._next_deadline() is None or time.monotonic() < self._next_deadline()):
+                    deadline = self._next_deadline()
+                    self._wakeup.wait(None if deadline is None else deadline - time.monotonic())
+                if not self._running:
+                    return
+            try:
+                self.flush(due_only=True)
+            except Exception:
+                # Hata loglandı; komutlar bir sonraki pencerede tekrar denenir
+                time.sleep(self.window)
@@ -0,0 +1,147 @@
+# utils/event_hub.py: (Firebase değişikliklerini bağlı istemcilere dağıtan süreç içi hub)
+
+import itertools
+import threading
+from collections import deque
+from utils.state_cache import join_path, split_path
+
+
+class Subscription:
+    """
+    Bir istemcinin olay kuyruğu. Kuyruk dolarsa en eski olaylar atılır ve
+    istemciye durumu yeniden okuması gerektiği bildirilir (overflowed).
+    """
+
+    def __init__(self, rooms=None, max_queue=256):
+        self.rooms = set(rooms) if rooms else None
+        self.max_queue = max_queue
+        self.overflowed = False
+        self._events = deque()
+        self._ready = threading.Condition()
+
+    def matches(self, path):
+        """Olay yolu (örn. "sensors/salon/gas") istemcinin odalarından birine mi ait."""
+        if self.rooms is None:
+            return True
+        segments = split_path(path)
+        return len(segments) > 1 and segments[1] in self.rooms
+
+    def push(self, event):
+        with self._ready:
+            if len(self._events) >= self.max_queue:
+                self._events.popleft()
+                self.overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        """
+        Bekleyen olayları döner; timeout içinde olay gelmezse boş liste.
+
+        Returns:
+            tuple: (olaylar, overflowed); overflowed okununca sıfırlanır
+        """
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class EventHub:
+    """
+    SubtreeListener olaylarını "değişen yol + değer" olaylarına çevirip tüm
+    abonelere dağıtır; böylece N istemci için tek bir Firebase listen()
+    aboneliği yeterli olur.
+
+    Son history_size olay tutulur; yeniden bağlanan istemci Last-Event-ID ile
+    kaçırdığı olayları alabilir. max_subscribers verilirse aynı anda en fazla
+    o kadar abonelik açılabilir.
+    """
+
+    def __init__(self, max_queue=256, history_size=1024, max_subscribers=None):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, rooms=None):
+        """
+        Yeni bir abonelik açar. Sınır kontrolü ve ekleme aynı kilit altında
+        yapılır; eşzamanlı bağlantılar sınırı aşamaz.
+
+        Returns:
+            Subscription: Açılan abonelik (sınır doluysa None)
+        """
+        subscription = Subscription(rooms, self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Aboneliği kapatır."""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def replay(self, subscription, last_event_id):
+        """
+        last_event_id'den sonraki olayları aboneliğe yeniden ekler.
+
+        Returns:
+            bool: Kaçırılan olayların tümü geçmişte bulunduysa True
+        """
+        with self._lock:
+            history = list(self._history)
+        # Kimlikler süreç başına sayılır; yeniden başlatma ya da başka bir
+        # worker'dan gelen kimlik geçmişle örtüşmez
+        if not history or history[0]["id"] > last_event_id + 1 or last_event_id > history[-1]["id"]:
+            return False
+        for event in history:
+            if event["id"] > last_event_id and subscription.matches(event["path"]):
+                subscription.push(event)
+        return True
+
+    def publish(self, path, value):
+        """Bir yol değişikliğini ilgili abonelere dağıtır."""
+        with self._lock:
+            event = {"id": next(self._ids), "path": path, "value": value}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            if subscription.matches(path):
+                subscription.push(event)
+
+    def apply_event(self, root, event_type, path, data):
+        """
+        Firebase listen() olayını yayınlar (SubtreeListener callback'i).
+
+        Kök seviyesindeki olaylar (ilk snapshot ya da kök yazması) oda başına
+        ayrı olaylara bölünür; istemci sadece kendi odalarının verisini alır.
+        """
+        full_path = join_path(root, path)
+        if event_type == "patch" and isinstance(data, dict):
+            changes = [(join_path(full_path, key), value) for key, value in data.items()]
+        elif event_type == "put":
+            changes = [(full_path, data)]
+        else:
+            return
+
+        for change_path, value in changes:
+            if len(split_path(change_path)) == 1 and isinstance(value, dict):
+                for room, room_value in value.items():
+                    self.publish(join_path(change_path, room), room_value)
+            else:
+                self.publish(change_path, value)
+
+    def stats(self):
+        """Hub istatistiklerini döner."""
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "published": self.published}
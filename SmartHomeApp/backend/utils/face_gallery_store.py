@@ -0,0 +1,262 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: process'ler arası kilit yok
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+IMAGE_EXTENSIONS = (".jpg", ".png")
+
+# add_face'in dosya adına eklediği zaman damgası: <isim>_YYYYmmdd_HHMMSS.jpg
+_TIMESTAMP_SUFFIX = re.compile(r"_\d{8}_\d{6}$")
+
+
+def name_from_filename(filename):
+    """Yüz dosyasının adından kişi adını çıkarır."""
+    stem = os.path.splitext(filename)[0]
+    return _TIMESTAMP_SUFFIX.sub("", stem)
+
+
+def file_content_hash(path):
+    """Dosya içeriğinin SHA-256 özetini döner."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FaceGalleryStore:
+    """
+    Yüz galerisinin önceden hesaplanmış embedding deposu.
+
+    Embedding'ler tek bir float32 matris olarak embeddings-<sürüm>.npy dosyasında,
+    her satırın dosya adı, kişi adı ve içerik özeti manifest.json'da tutulur.
+    Açılışta sadece yeni veya değişmiş görüntüler kodlanır; içeriği bilinen
+    bir görüntünün embedding'i özet üzerinden yeniden kullanılır. Silme ve
+    arama işlemleri isim ve dosya indeksleri üzerinden yapılır.
+
+    Matris salt okunur olarak memory-map edilir; aynı makinedeki tüm worker
+    process'leri aynı sayfaları paylaşır. Yazmalar dosya kilidi altında en
+    güncel depo üzerine yapılır ve sürümü artırır; her sürümün matrisi ayrı
+    bir dosyadır ve manifest hangisinin geçerli olduğunu söyler, böylece
+    okuyucu hiçbir zaman eski manifest ile yeni matrisi eşleştirmez.
+    Okuyucular changed() ile değişikliği görüp yeniden yükler.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, "manifest.json")
+        self.lock_path = os.path.join(store_dir, ".lock")
+        self.version = 0
+        self._loaded_stamp = None
+        self.entries = []  # satır sırasıyla {"filename", "name", "hash", "mtime", "size"}
+        self.matrix = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self._by_filename = {}
+        self._by_name = {}
+        self._by_hash = {}
+        if not os.path.exists(store_dir):
+            os.makedirs(store_dir)
+        self.load()
+
+    @property
+    def names(self):
+        return [entry["name"] for entry in self.entries]
+
+    @contextmanager
+    def locked(self):
+        """Depoyu yazan process'leri birbirinden ayıran dosya kilidi."""
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _manifest_stamp(self):
+        # Manifest her kayıtta os.replace ile değişir, inode ve mtime yeter
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def changed(self):
+        """Depo son yüklemeden sonra başka bir process tarafından değiştirildiyse True."""
+        return self._manifest_stamp() != self._loaded_stamp
+
+    def reload_if_changed(self):
+        """Depo değiştiyse yeniden yükler; yüklendiyse True döner."""
+        if not self.changed():
+            return False
+        self.load()
+        return True
+
+    def load(self):
+        """Manifest'i okur ve embedding matrisini salt okunur memory-map eder."""
+        try:
+            for _ in range(3):
+                stamp = self._manifest_stamp()
+                if stamp is None:
+                    return
+                with open(self.manifest_path, "r") as f:
+                    manifest = json.load(f)
+                matrix_path = os.path.join(self.store_dir, manifest.get("matrix", "embeddings.npy"))
+                try:
+                    matrix = np.load(matrix_path, mmap_mode="r")
+                    break
+                except FileNotFoundError:
+                    # Manifest okunduktan sonra yeni bir sürüm yazıldı, tekrar dene
+                    continue
+            else:
+                return
+            self._loaded_stamp = stamp
+            if len(manifest.get("entries", [])) != len(matrix):
+                logger.warning("Yüz galerisi manifest'i ile matris uyuşmuyor, yeniden oluşturulacak.")
+                return
+            self.version = manifest.get("version", 0)
+            self._replace(manifest["entries"], matrix)
+        except Exception as e:
+            logger.error(f"Yüz galerisi okunurken hata: {str(e)}")
+
+    def save(self):
+        """Manifest ve matrisi atomik olarak diske yazar (kilit altında çağrılmalı)."""
+        self.version += 1
+        matrix_name = f"embeddings-{self.version}.npy"
+        matrix_path = os.path.join(self.store_dir, matrix_name)
+        matrix_tmp = matrix_path + ".tmp.npy"
+        manifest_tmp = self.manifest_path + ".tmp"
+        np.save(matrix_tmp, self.matrix)
+        with open(manifest_tmp, "w") as f:
+            json.dump({"version": self.version, "matrix": matrix_name, "entries": self.entries}, f, ensure_ascii=False)
+        # Önce matris, sonra manifest: okuyucular manifest'i görünce matris hazırdır
+        os.replace(matrix_tmp, matrix_path)
+        os.replace(manifest_tmp, self.manifest_path)
+        # Eski sürümler silinir; onları map etmiş process'ler etkilenmez
+        for item in os.scandir(self.store_dir):
+            if item.name.startswith("embeddings") and item.name.endswith(".npy") and item.name != matrix_name:
+                os.remove(item.path)
+        # Yazılan matris de paylaşılan memory-map üzerinden kullanılır
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self._loaded_stamp = self._manifest_stamp()
+
+    def sync(self, faces_dir, encode_file):
+        """
+        Depoyu yüz dizini ile eşitler.
+
+        Args:
+            faces_dir (str): Yüz görüntülerinin dizini
+            encode_file (callable): path -> 128 boyutlu kodlama ya da None
+
+        Returns:
+            int: Yeniden kodlanan görüntü sayısı
+        """
+        with self.locked():
+            # Başka bir worker az önce eşitlemiş olabilir
+            self.reload_if_changed()
+            return self._sync(faces_dir, encode_file)
+
+    def _sync(self, faces_dir, encode_file):
+        entries = []
+        rows = []
+        seen_hashes = {}  # bu taramada görülen özet -> rows indeksi
+        encoded = 0
+        for item in os.scandir(faces_dir):
+            if not item.is_file() or not item.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            stat = item.stat()
+            known = self._by_filename.get(item.name)
+            if known is not None and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+                entries.append(known)
+                rows.append(self.matrix[known["row"]])
+                continue
+
+            content_hash = file_content_hash(item.path)
+            if content_hash in seen_hashes:
+                encoding = rows[seen_hashes[content_hash]]
+            elif content_hash in self._by_hash:
+                encoding = self.matrix[self._by_hash[content_hash]["row"]]
+            else:
+                encoding = encode_file(item.path)
+                encoded += 1
+                if encoding is None:
+                    logger.warning(f"{item.name} dosyasında yüz bulunamadı.")
+                    continue
+            seen_hashes[content_hash] = len(rows)
+            entries.append(self._entry(item.name, content_hash, stat))
+            rows.append(np.asarray(encoding, dtype=np.float32))
+
+        changed = encoded > 0 or [e["filename"] for e in entries] != [e["filename"] for e in self.entries]
+        self._replace(entries, rows)
+        if changed:
+            self.save()
+        return encoded
+
+    def add(self, path, encoding):
+        """Diske yazılmış yeni bir yüz görüntüsünü depoya ekler."""
+        filename = os.path.basename(path)
+        entry = self._entry(filename, file_content_hash(path), os.stat(path))
+        with self.locked():
+            self.reload_if_changed()
+            entries = [e for e in self.entries if e["filename"] != filename] + [entry]
+            rows = [self.matrix[e["row"]] for e in entries[:-1]] + [np.asarray(encoding, dtype=np.float32)]
+            self._replace(entries, rows)
+            self.save()
+
+    def remove_name(self, name):
+        """
+        Bir kişiye ait tüm satırları depodan çıkarır.
+
+        Returns:
+            list: Silinen satırların dosya adları
+        """
+        with self.locked():
+            self.reload_if_changed()
+            removed = [entry["filename"] for entry in self._by_name.get(name, [])]
+            if not removed:
+                return []
+            entries = [e for e in self.entries if e["name"] != name]
+            self._replace(entries, [self.matrix[e["row"]] for e in entries])
+            self.save()
+            return removed
+
+    def filenames_for(self, name):
+        """Bir kişiye ait dosya adlarını indeksten döner."""
+        return [entry["filename"] for entry in self._by_name.get(name, [])]
+
+    def _entry(self, filename, content_hash, stat):
+        return {
+            "filename": filename,
+            "name": name_from_filename(filename),
+            "hash": content_hash,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size
+        }
+
+    def _replace(self, entries, rows):
+        if isinstance(rows, np.ndarray):
+            matrix = rows  # memory-map kopyalanmadan kullanılır
+        else:
+            matrix = np.asarray(rows, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.matrix = matrix if matrix.flags.c_contiguous else np.ascontiguousarray(matrix)
+        self.entries = []
+        self._by_filename = {}
+        self._by_name = {}
+        self._by_hash = {}
+        for row, entry in enumerate(entries):
+            entry = dict(entry, row=row)
+            self.entries.append(entry)
+            self._by_filename[entry["filename"]] = entry
+            self._by_name.setdefault(entry["name"], []).append(entry)
+            self._by_hash.setdefault(entry["hash"], entry)
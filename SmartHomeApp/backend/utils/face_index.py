@@ -0,0 +1,285 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+
+
+def squared_distances(queries, vectors, vector_sq_norms=None):
+    """
+    Sorgular ile vektörler arasındaki kare Öklid uzaklıklarını tek bir
+    matris çarpımıyla hesaplar: |q - v|^2 = |q|^2 + |v|^2 - 2 q.v
+
+    Returns:
+        numpy.ndarray: (len(queries) x len(vectors)) matris
+    """
+    if vector_sq_norms is None:
+        vector_sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+    query_sq_norms = np.einsum("ij,ij->i", queries, queries)
+    sq_distances = query_sq_norms[:, None] + vector_sq_norms[None, :] - 2.0 * queries @ vectors.T
+    return np.maximum(sq_distances, 0.0)
+
+
+class _VectorList:
+    """
+    Kapasitesi ikiye katlanarak büyüyen, swap-remove ile silinen vektör listesi.
+
+    from_matrix ile salt okunur (örn. memory-map edilmiş) bir matris
+    kopyalanmadan sarılabilir; ilk değişiklikte kendi kopyasına geçer.
+    """
+
+    def __init__(self, capacity=16):
+        self._vectors = np.empty((capacity, ENCODING_SIZE), dtype=np.float32)
+        self._sq_norms = np.empty((capacity,), dtype=np.float32)
+        self.labels = []
+
+    @classmethod
+    def from_matrix(cls, labels, vectors):
+        """Matrisi kopyalamadan sarar; sadece kare normlar hesaplanır."""
+        vector_list = cls(capacity=0)
+        vector_list._vectors = vectors
+        vector_list._sq_norms = np.einsum("ij,ij->i", vectors, vectors).astype(np.float32)
+        vector_list.labels = list(labels)
+        return vector_list
+
+    def _ensure_writable(self):
+        # Paylaşılan matrise yazılmaz, önce kopyalanır (copy-on-write)
+        if not self._vectors.flags.writeable:
+            size = len(self.labels)
+            owned = np.empty((max(16, 2 * size), ENCODING_SIZE), dtype=np.float32)
+            owned[:size] = self._vectors[:size]
+            self._vectors = owned
+            norms = np.empty((len(owned),), dtype=np.float32)
+            norms[:size] = self._sq_norms[:size]
+            self._sq_norms = norms
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def vectors(self):
+        return self._vectors[:len(self.labels)]
+
+    @property
+    def sq_norms(self):
+        return self._sq_norms[:len(self.labels)]
+
+    def append(self, label, vector):
+        self._ensure_writable()
+        size = len(self.labels)
+        if size == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+            self._sq_norms = np.concatenate([self._sq_norms, np.empty_like(self._sq_norms)])
+        self._vectors[size] = vector
+        self._sq_norms[size] = float(vector @ vector)
+        self.labels.append(label)
+
+    def extend(self, labels, vectors):
+        """Birden fazla vektörü tek kopyalamayla ekler."""
+        self._ensure_writable()
+        size = len(self.labels)
+        needed = size + len(vectors)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            grown = np.empty((capacity, ENCODING_SIZE), dtype=np.float32)
+            grown[:size] = self._vectors[:size]
+            grown_norms = np.empty((capacity,), dtype=np.float32)
+            grown_norms[:size] = self._sq_norms[:size]
+            self._vectors, self._sq_norms = grown, grown_norms
+        self._vectors[size:needed] = vectors
+        self._sq_norms[size:needed] = np.einsum("ij,ij->i", vectors, vectors)
+        self.labels.extend(labels)
+
+    def remove_label(self, label):
+        """Bir etikete ait tüm vektörleri siler; silinen sayısını döner."""
+        if label not in self.labels:
+            return 0
+        self._ensure_writable()
+        removed = 0
+        position = 0
+        while position < len(self.labels):
+            if self.labels[position] != label:
+                position += 1
+                continue
+            last = len(self.labels) - 1
+            self._vectors[position] = self._vectors[last]
+            self._sq_norms[position] = self._sq_norms[last]
+            self.labels[position] = self.labels[last]
+            self.labels.pop()
+            removed += 1
+        return removed
+
+
+class ExactFaceIndex:
+    """Tüm galeriyle tam (brute-force) karşılaştırma yapan indeks."""
+
+    def __init__(self):
+        self._list = _VectorList()
+
+    def __len__(self):
+        return len(self._list)
+
+    def build(self, vectors, labels):
+        """
+        İndeksi verilen vektörlerle sıfırdan oluşturur. Salt okunur bitişik
+        bir matris (örn. memory-map edilmiş galeri) kopyalanmadan kullanılır.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        if vectors.flags.c_contiguous and not vectors.flags.writeable:
+            self._list = _VectorList.from_matrix(labels, vectors)
+        else:
+            self._list = _VectorList(max(16, len(vectors)))
+            self._list.extend(list(labels), vectors)
+
+    def add(self, label, vector):
+        """Yeniden oluşturmadan tek bir vektör ekler."""
+        self._list.append(label, np.asarray(vector, dtype=np.float32).reshape(ENCODING_SIZE))
+
+    def remove(self, label):
+        """Bir etikete ait tüm vektörleri siler."""
+        return self._list.remove_label(label)
+
+    def search(self, queries):
+        """
+        Her sorgu için en yakın vektörü bulur.
+
+        Returns:
+            tuple: (etiketler listesi, uzaklıklar dizisi); indeks boşsa etiket None
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        if len(self._list) == 0:
+            return [None] * len(queries), np.full(len(queries), np.inf, dtype=np.float32)
+        sq_distances = squared_distances(queries, self._list.vectors, self._list.sq_norms)
+        best = np.argmin(sq_distances, axis=1)
+        distances = np.sqrt(sq_distances[np.arange(len(queries)), best])
+        return [self._list.labels[index] for index in best], distances
+
+
+class IVFFaceIndex:
+    """
+    IVF (inverted file) tarzı yaklaşık en yakın komşu indeksi.
+
+    Vektörler k-means ile bulunan nlist merkeze göre listelere bölünür; sorgu
+    sadece en yakın nprobe listede aranır. nprobe büyüdükçe isabet (recall)
+    artar, gecikme de artar; nprobe == nlist tam aramaya eşittir. Ekleme ve
+    silme listeleri yerinde günceller, yeniden eğitim gerektirmez.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, train_iterations=10, max_train_size=20000, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.max_train_size = max_train_size
+        self.seed = seed
+        self.centroids = None
+        self._centroid_sq_norms = None
+        self._lists = []
+
+    def __len__(self):
+        return sum(len(vector_list) for vector_list in self._lists)
+
+    def build(self, vectors, labels):
+        """Merkezleri eğitir ve tüm vektörleri listelere dağıtır."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.train(vectors)
+        if len(vectors) == 0:
+            return
+        labels = list(labels)
+        assignments = self._assign(vectors)
+        for list_id in np.unique(assignments):
+            rows = np.nonzero(assignments == list_id)[0]
+            self._lists[list_id].extend([labels[row] for row in rows], vectors[rows])
+
+    def train(self, vectors):
+        """Merkezleri k-means (Lloyd) ile eğitir; mevcut listeler boşaltılır."""
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = max(1, min(nlist, len(vectors))) if len(vectors) else 1
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if len(sample) > self.max_train_size:
+            sample = sample[rng.choice(len(sample), self.max_train_size, replace=False)]
+
+        if len(sample) == 0:
+            centroids = np.zeros((1, ENCODING_SIZE), dtype=np.float32)
+        else:
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(self.train_iterations):
+                assignments = np.argmin(squared_distances(sample, centroids), axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignments, sample)
+                counts = np.bincount(assignments, minlength=len(centroids))
+                non_empty = counts > 0
+                centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._centroid_sq_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        self._lists = [_VectorList() for _ in range(len(self.centroids))]
+
+    def add(self, label, vector):
+        """Yeniden eğitmeden tek bir vektörü en yakın listeye ekler."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(ENCODING_SIZE)
+        if self.centroids is None:
+            self.build(vector[None, :], [label])
+            return
+        self._lists[self._assign(vector[None, :])[0]].append(label, vector)
+
+    def remove(self, label):
+        """Bir etikete ait tüm vektörleri tüm listelerden siler."""
+        return sum(vector_list.remove_label(label) for vector_list in self._lists)
+
+    def search(self, queries, nprobe=None):
+        """
+        Her sorgu için yaklaşık en yakın vektörü bulur.
+
+        Args:
+            queries: (F x 128) sorgular
+            nprobe (int, optional): Bakılacak liste sayısı (varsayılan: self.nprobe)
+
+        Returns:
+            tuple: (etiketler listesi, uzaklıklar dizisi); bulunamazsa etiket None
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        labels = [None] * len(queries)
+        distances = np.full(len(queries), np.inf, dtype=np.float32)
+        if self.centroids is None or len(queries) == 0:
+            return labels, distances
+
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_distances = squared_distances(queries, self.centroids, self._centroid_sq_norms)
+        probes = np.argpartition(centroid_distances, nprobe - 1, axis=1)[:, :nprobe]
+
+        best_sq = np.full(len(queries), np.inf, dtype=np.float32)
+        # Her liste bir kez taranır, o listeye düşen tüm sorgularla birlikte
+        for list_id in np.unique(probes):
+            vector_list = self._lists[list_id]
+            if len(vector_list) == 0:
+                continue
+            query_rows = np.nonzero((probes == list_id).any(axis=1))[0]
+            sq_distances = squared_distances(queries[query_rows], vector_list.vectors, vector_list.sq_norms)
+            nearest = np.argmin(sq_distances, axis=1)
+            nearest_sq = sq_distances[np.arange(len(query_rows)), nearest]
+            for query_row, index, sq_distance in zip(query_rows, nearest, nearest_sq):
+                if sq_distance < best_sq[query_row]:
+                    best_sq[query_row] = sq_distance
+                    labels[query_row] = vector_list.labels[index]
+
+        return labels, np.sqrt(best_sq)
+
+    def _assign(self, vectors):
+        return np.argmin(squared_distances(vectors, self.centroids, self._centroid_sq_norms), axis=1)
+
+
+def create_face_index(kind="exact", **options):
+    """
+    Yapılandırmaya göre yüz indeksi oluşturur.
+
+    Args:
+        kind (str): "exact" veya "ivf"
+        **options: IVFFaceIndex parametreleri (nlist, nprobe, ...)
+    """
+    if kind == "ivf":
+        return IVFFaceIndex(**options)
+    if kind != "exact":
+        logger.warning(f"Bilinmeyen yüz indeksi tipi: {kind}, tam arama kullanılacak.")
+    return ExactFaceIndex()
@@ -1,50 +1,66 @@
 import cv2
 import numpy as np
 import face_recognition
+from face_recognition import api as face_recognition_api
+import dlib
 import os
 import logging
+import threading
 from datetime import datetime
+from utils.face_gallery_store import FaceGalleryStore
+from utils.face_index import ExactFaceIndex
+
+# face_recognition kütüphanesinin varsayılan eşleşme eşiği
+DEFAULT_TOLERANCE = 0.6
+ENCODING_SIZE = 128
 
 class FaceRecognitionModule:
-    def __init__(self):
-        self.known_face_encodings = []
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, index=None, sync=True):
+        # Bilinen yüzler tek, bitişik bir float32 matriste tutulur (N x 128)
+        self.known_face_matrix = np.empty((0, ENCODING_SIZE), dtype=np.float32)
         self.known_face_names = []
+        self.tolerance = tolerance
+        # Eşleştirme indeksi (utils.face_index): tam ya da yaklaşık arama
+        self.index = index if index is not None else ExactFaceIndex()
         self.face_locations = []
         self.face_encodings = []
         self.face_names = []
         self.process_this_frame = True
         self.logger = logging.getLogger(__name__)
+        self._gallery_lock = threading.Lock()
         
         # Yüz veritabanı dizini
-        self.faces_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "faces")
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+        self.faces_dir = os.path.join(data_dir, "faces")
         if not os.path.exists(self.faces_dir):
             os.makedirs(self.faces_dir)
+
+        # Önceden hesaplanmış embedding deposu
+        self.gallery_store = FaceGalleryStore(os.path.join(data_dir, "face_gallery"))
             
         # Kayıtlı yüzleri yükle
-        self.load_known_faces()
+        self.load_known_faces(sync=sync)
         
-    def load_known_faces(self):
-        """Kayıtlı yüzleri yükler."""
+    def load_known_faces(self, sync=True):
+        """
+        Kayıtlı yüzleri yükler. Embedding'ler galeri deposundan okunur; sadece
+        yeni veya değişmiş görüntüler kodlanır.
+
+        Args:
+            sync (bool): False ise yüz dizini taranmaz, depo olduğu gibi kullanılır
+        """
         try:
-            for filename in os.listdir(self.faces_dir):
-                if filename.endswith(".jpg") or filename.endswith(".png"):
-                    # Dosya adından kişi adını al (uzantıyı çıkar)
-                    name = os.path.splitext(filename)[0]
-                    
-                    # Yüz resmini yükle
-                    image_path = os.path.join(self.faces_dir, filename)
-                    image = face_recognition.load_image_file(image_path)
-                    
-                    # Yüz kodlamasını al
-                    face_encoding = face_recognition.face_encodings(image)[0]
-                    
-                    # Listelere ekle
-                    self.known_face_encodings.append(face_encoding)
-                    self.known_face_names.append(name)
-                    
-            self.logger.info(f"{len(self.known_face_names)} adet yüz yüklendi.")
+            encoded = self.gallery_store.sync(self.faces_dir, self._encode_file) if sync else 0
+            self._set_gallery(self.gallery_store.matrix, self.gallery_store.names)
+            self.logger.info(f"{len(self.known_face_names)} adet yüz yüklendi ({encoded} görüntü yeniden kodlandı).")
         except Exception as e:
             self.logger.error(f"Yüzler yüklenirken hata: {str(e)}")
+
+    def _encode_file(self, image_path):
+        """Bir yüz görüntüsünün ilk yüzünün kodlamasını döner, yüz yoksa None."""
+        image = face_recognition.load_image_file(image_path)
+        image_encodings = face_recognition.face_encodings(image)
+        return image_encodings[0] if image_encodings else None
             
     def add_face(self, image, name):
         """
@@ -66,9 +82,16 @@ class FaceRecognitionModule:
             filepath = os.path.join(self.faces_dir, filename)
             cv2.imwrite(filepath, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
             
-            # Listelere ekle
-            self.known_face_encodings.append(face_encoding)
-            self.known_face_names.append(name)
+            # Galeriye ekle (indeks yeniden oluşturulmadan güncellenir)
+            with self._gallery_lock:
+                expected_version = self.gallery_store.version + 1
+                self.gallery_store.add(filepath, face_encoding)
+                if self.gallery_store.version == expected_version:
+                    self._set_gallery(self.gallery_store.matrix, self.gallery_store.names, rebuild_index=False)
+                    self.index.add(name, face_encoding)
+                else:
+                    # Depo arada başka bir process'te değişmiş, indeks baştan kurulur
+                    self._set_gallery(self.gallery_store.matrix, self.gallery_store.names)
             
             self.logger.info(f"Yeni yüz eklendi: {name}")
             return True
@@ -76,36 +99,198 @@ class FaceRecognitionModule:
             self.logger.error(f"Yüz eklenirken hata: {str(e)}")
             return False
             
+    def refresh_gallery(self):
+        """
+        Galeri deposu başka bir process'te (kayıt/silme) değiştiyse paylaşılan
+        matrisi yeniden map eder ve indeksi kurar. Değişiklik kontrolü tek bir
+        stat çağrısıdır.
+
+        Returns:
+            bool: Galeri yeniden yüklendiyse True
+        """
+        if not self.gallery_store.changed():
+            return False
+        with self._gallery_lock:
+            if not self.gallery_store.reload_if_changed():
+                return False
+            self._set_gallery(self.gallery_store.matrix, self.gallery_store.names)
+        self.logger.info(f"Yüz galerisi yeniden yüklendi (sürüm {self.gallery_store.version}).")
+        return True
+
+    def _set_gallery(self, encodings, names, rebuild_index=True):
+        """Galeri matrisini ve indeksi günceller."""
+        matrix = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.known_face_matrix = np.ascontiguousarray(matrix)
+        self.known_face_names = list(names)
+        if rebuild_index:
+            self.index.build(self.known_face_matrix, self.known_face_names)
+
+    def match_encodings(self, face_encodings, tolerance=None):
+        """
+        Her yüz kodlaması için en yakın bilinen kişiyi bulur.
+
+        Args:
+            face_encodings: (F x 128) kodlamalar
+            tolerance (float, optional): Eşleşme eşiği (varsayılan: self.tolerance)
+
+        Returns:
+            list: Her yüz için (isim, uzaklık); eşik aşılırsa isim "unknown",
+            galeri boşsa uzaklık None
+        """
+        if tolerance is None:
+            tolerance = self.tolerance
+        self.refresh_gallery()
+        if len(face_encodings) == 0:
+            return []
+        if not self.known_face_names:
+            return [("unknown", None)] * len(face_encodings)
+
+        # En yakın kişi indeksten bulunur (tam ya da yaklaşık)
+        labels, distances = self.index.search(face_encodings)
+        return [
+            (label if label is not None and distance <= tolerance else "unknown",
+             float(distance) if label is not None else None)
+            for label, distance in zip(labels, distances)
+        ]
+
+    def recognize_faces(self, image, tolerance=None):
+        """
+        Görüntüdeki tüm yüzleri tanır.
+        
+        Args:
+            image: Görüntü (numpy array, RGB)
+            tolerance (float, optional): Eşleşme eşiği
+            
+        Returns:
+            list: Her yüz için {"name", "distance", "location"} sözlükleri
+        """
+        face_locations = face_recognition.face_locations(image)
+        if not face_locations:
+            return []
+
+        face_encodings = face_recognition.face_encodings(image, face_locations)
+        matches = self.match_encodings(face_encodings, tolerance)
+        return [
+            {"name": name, "distance": distance, "location": location}
+            for (name, distance), location in zip(matches, face_locations)
+        ]
+
+    def recognize_batch(self, images, tolerance=None, model="hog"):
+        """
+        Birden fazla karedeki yüzleri tek seferde tanır.
+
+        Tüm karelerde tespit yapılır, bütün yüzler tek bir toplu dlib
+        çağrısıyla kodlanır ve tek bir vektörel aramayla eşleştirilir.
+        Kareler arası sonuçlar oylamayla tek bir kimliğe birleştirilir.
+
+        Args:
+            images (list): Görüntüler (numpy array, RGB)
+            tolerance (float, optional): Eşleşme eşiği
+            model (str): "hog" ya da "cnn" (cnn'de tespit de toplu yapılır)
+
+        Returns:
+            dict: {"frames": kare başına yüz listeleri, "identity": birleşik karar}
+        """
+        if model == "cnn" and len({image.shape for image in images}) == 1:
+            all_locations = face_recognition.batch_face_locations(list(images), batch_size=len(images))
+        else:
+            all_locations = [face_recognition.face_locations(image, model=model) for image in images]
+
+        # Her karenin yüz noktaları (5 noktalı model, face_encodings ile aynı)
+        batch_images = []
+        batch_detections = []
+        for image, locations in zip(images, all_locations):
+            if not locations:
+                continue
+            detections = dlib.full_object_detections()
+            for landmarks in face_recognition_api._raw_face_landmarks(image, locations, model="small"):
+                detections.append(landmarks)
+            batch_images.append(image)
+            batch_detections.append(detections)
+
+        encodings = []
+        if batch_images:
+            encoder = face_recognition_api.face_encoder
+            try:
+                descriptors = encoder.compute_face_descriptor(batch_images, batch_detections, 1)
+            except TypeError:
+                # Toplu imzayı desteklemeyen eski dlib: kare başına (kare içindeki yüzler yine toplu)
+                descriptors = [
+                    encoder.compute_face_descriptor(image, detections, 1)
+                    for image, detections in zip(batch_images, batch_detections)
+                ]
+            for frame_descriptors in descriptors:
+                encodings.extend(np.array(descriptor) for descriptor in frame_descriptors)
+
+        matches = iter(self.match_encodings(encodings, tolerance))
+        frames = [
+            [
+                {"name": name, "distance": distance, "location": location}
+                for location, (name, distance) in zip(locations, matches)
+            ]
+            for locations in all_locations
+        ]
+        return {"frames": frames, "identity": self.fuse_identity(frames)}
+
+    def fuse_identity(self, frames):
+        """
+        Kare sonuçlarını tek bir kimlik kararına birleştirir: en çok karede
+        tanınan kişi seçilir, eşitlikte ortalama uzaklığı küçük olan kazanır.
+
+        Returns:
+            dict: {"name", "votes", "frames", "distance"}; kimse tanınmazsa
+            isim "unknown", hiç yüz yoksa "not_detected"
+        """
+        votes = {}
+        face_count = 0
+        for faces in frames:
+            face_count += len(faces)
+            # Bir kişi aynı karede birden fazla kez sayılmaz
+            best_in_frame = {}
+            for face in faces:
+                if face["name"] == "unknown":
+                    continue
+                current = best_in_frame.get(face["name"])
+                if current is None or face["distance"] < current:
+                    best_in_frame[face["name"]] = face["distance"]
+            for name, distance in best_in_frame.items():
+                votes.setdefault(name, []).append(distance)
+
+        if not votes:
+            return {
+                "name": "unknown" if face_count else "not_detected",
+                "votes": 0,
+                "frames": len(frames),
+                "distance": None
+            }
+        name, distances = min(votes.items(), key=lambda item: (-len(item[1]), sum(item[1]) / len(item[1])))
+        return {
+            "name": name,
+            "votes": len(distances),
+            "frames": len(frames),
+            "distance": sum(distances) / len(distances)
+        }
+
     def recognize_face(self, image):
         """
-        Görüntüdeki yüzü tanır.
+        Görüntüdeki yüzü tanır. Birden fazla yüz varsa galeriye en yakın
+        tanınan yüz seçilir.
         
         Args:
             image: Görüntü (numpy array)
             
         Returns:
-            str: Tanınan kişinin adı, tanınmazsa "unknown"
+            str: Tanınan kişinin adı, tanınmazsa "unknown", yüz yoksa "not_detected"
         """
         try:
-            # Yüz konumlarını bul
-            face_locations = face_recognition.face_locations(image)
-            
-            if not face_locations:
+            faces = self.recognize_faces(image)
+            if not faces:
                 return "not_detected"
-                
-            # Yüz kodlamalarını al
-            face_encodings = face_recognition.face_encodings(image, face_locations)
-            
-            # Her yüz için en yakın eşleşmeyi bul
-            for face_encoding in face_encodings:
-                matches = face_recognition.compare_faces(self.known_face_encodings, face_encoding)
-                name = "unknown"
-                
-                if True in matches:
-                    first_match_index = matches.index(True)
-                    name = self.known_face_names[first_match_index]
-                    
-                return name
+
+            recognized = [face for face in faces if face["name"] != "unknown"]
+            if not recognized:
+                return "unknown"
+            return min(recognized, key=lambda face: face["distance"])["name"]
                 
         except Exception as e:
             self.logger.error(f"Yüz tanıma hatası: {str(e)}")
@@ -122,19 +307,21 @@ class FaceRecognitionModule:
             bool: İşlem başarılı ise True
         """
         try:
-            # Kişinin tüm yüz dosyalarını bul
-            files_to_delete = [f for f in os.listdir(self.faces_dir) if f.startswith(name + "_")]
+            # Kişinin tüm yüz dosyalarını indeksten bul ve galeriden kaldır
+            with self._gallery_lock:
+                expected_version = self.gallery_store.version + 1
+                files_to_delete = self.gallery_store.remove_name(name)
+                if self.gallery_store.version == expected_version:
+                    self._set_gallery(self.gallery_store.matrix, self.gallery_store.names, rebuild_index=False)
+                    self.index.remove(name)
+                else:
+                    self._set_gallery(self.gallery_store.matrix, self.gallery_store.names)
             
             # Dosyaları sil
             for filename in files_to_delete:
                 filepath = os.path.join(self.faces_dir, filename)
-                os.remove(filepath)
-                
-            # Listelerden kaldır
-            indices = [i for i, x in enumerate(self.known_face_names) if x == name]
-            for index in sorted(indices, reverse=True):
-                del self.known_face_names[index]
-                del self.known_face_encodings[index]
+                if os.path.exists(filepath):
+                    os.remove(filepath)
                 
             self.logger.info(f"Yüz silindi: {name}")
             return True
@@ -2,9 +2,13 @@ import cv2
 import face_recognition
 import dlib
 import os
+import queue
+import threading
+import time
 import numpy as np
-import requests
 from pathlib import Path
+from face_tracker import FaceTracker
+from face_uplink import FaceUplink
 
 # -------------------------
 # MODEL YOLLARI (Yüz tanıma için gerekli eğitimli modeller)
@@ -17,6 +21,15 @@ FACE_ENCODER_PATH = os.path.join(MODEL_DIR, "dlib_face_recognition_resnet_model_
 pose_predictor = dlib.shape_predictor(SHAPE_PREDICTOR_PATH)
 face_encoder = dlib.face_recognition_model_v1(FACE_ENCODER_PATH)
 
+# -------------------------
+# PIPELINE AYARLARI
+# -------------------------
+DETECTION_SCALE = float(os.getenv("FACE_DETECTION_SCALE", "0.5"))  # Tespit küçültülmüş karede yapılır
+QUEUE_SIZE = 2  # Kuyruklar küçük tutulur, eski kareler atılır
+MATCH_TOLERANCE = 0.6
+STATS_INTERVAL = 5.0  # saniye
+IDENTITY_TTL = float(os.getenv("FACE_IDENTITY_TTL", "3.0"))  # Kimlik bu süreden sonra yeniden doğrulanır
+
 # -------------------------
 # TANINAN YÜZLERİ YÜKLE
 # -------------------------
@@ -48,6 +61,9 @@ for filename in os.listdir(KNOWN_FACES_DIR):
         else:
             print(f"No face detected in {filename}.")
 
+# Eşleştirme tek bir vektörel işlemle yapılır
+known_face_matrix = np.asarray(known_face_encodings, dtype=np.float32).reshape(-1, 128)
+
 # -------------------------
 # KAMERA BAŞLAT
 # -------------------------
@@ -60,59 +76,218 @@ print("Camera initialized...")
 # -------------------------
 # BACKEND URL (Flask API ile bağlantı)
 # -------------------------
-BACKEND_URL = "http://127.0.0.1:5001/face-unlock"  # Doğru portu kullandığından emin ol
+BACKEND_URL = os.getenv("FACE_BACKEND_URL", "http://127.0.0.1:5001/api/face-recognition")  # Doğru portu kullandığından emin ol
+DEVICE_ID = os.getenv("FACE_DEVICE_ID", "camera_1")
+UPLINK_DEBOUNCE = float(os.getenv("FACE_UPLINK_DEBOUNCE", "10.0"))  # Aynı kişi için saniye
+
+uplink = FaceUplink(BACKEND_URL, DEVICE_ID, debounce=UPLINK_DEBOUNCE)
+
 
 # -------------------------
-# ANA DÖNGÜ
+# AŞAMA İSTATİSTİKLERİ
 # -------------------------
-while True:
-    ret, frame = video_capture.read()
-    if not ret:
-        print("Failed to retrieve frame from camera.")
-        break
+class StageStats:
+    """Bir pipeline aşamasının FPS, gecikme ve atılan kare sayaçları."""
 
-    rgb_frame = frame[:, :, ::-1]
-    face_locations = face_recognition.face_locations(rgb_frame, model="hog")
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.count = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.window_start = time.monotonic()
 
-    if not face_locations:
-        cv2.imshow("Face Recognition", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-        continue
+    def record(self, latency):
+        with self.lock:
+            self.count += 1
+            self.latency_total += latency
+
+    def drop(self):
+        with self.lock:
+            self.dropped += 1
 
-    for (top, right, bottom, left) in face_locations:
-        rect = dlib.rectangle(left, top, right, bottom)
-        shape = pose_predictor(rgb_frame, rect)
-        face_encoding = np.array(
-            face_encoder.compute_face_descriptor(rgb_frame.astype(np.uint8), shape, 1)
-        )
+    def snapshot(self):
+        """Son aralığın istatistiklerini döner ve sayaçları sıfırlar."""
+        with self.lock:
+            now = time.monotonic()
+            elapsed = max(now - self.window_start, 1e-6)
+            fps = self.count / elapsed
+            latency_ms = (self.latency_total / self.count * 1000.0) if self.count else 0.0
+            dropped = self.dropped
+            self.count, self.dropped, self.latency_total = 0, 0, 0.0
+            self.window_start = now
+        return fps, latency_ms, dropped
 
-        matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
-        name = "Unknown"
 
-        if True in matches:
-            match_index = matches.index(True)
-            name = known_face_names[match_index]
-            print(f"{name} recognized.")
+stats = {
+    name: StageStats(name)
+    for name in ("capture", "detect", "encode", "descriptor", "end_to_end")
+}
 
-            # Backend'e POST isteği gönder
+
+def put_latest(target_queue, item, stage_stats):
+    """Kuyruk doluysa en eski öğeyi atıp yenisini ekler; üretici hiç beklemez."""
+    while True:
+        try:
+            target_queue.put_nowait(item)
+            return
+        except queue.Full:
             try:
-                response = requests.post(BACKEND_URL, json={"name": name})
-                print("Backend response:", response.json())
-            except Exception as e:
-                print("Error contacting backend:", e)
-        else:
-            print("Face not recognized.")
+                target_queue.get_nowait()
+                stage_stats.drop()
+            except queue.Empty:
+                pass
+
+
+# -------------------------
+# PIPELINE KUYRUKLARI VE ORTAK DURUM
+# -------------------------
+detect_queue = queue.Queue(maxsize=QUEUE_SIZE)   # capture -> detect
+encode_queue = queue.Queue(maxsize=QUEUE_SIZE)   # detect -> encode
+stop_event = threading.Event()
+
+display_lock = threading.Lock()
+latest_frame = None
+tracker = FaceTracker(identity_ttl=IDENTITY_TTL)
+
+
+def capture_stage():
+    """Kameradan kare okur; tespit aşaması yetişemezse eski kareler atılır."""
+    global latest_frame
+    while not stop_event.is_set():
+        started = time.monotonic()
+        ret, frame = video_capture.read()
+        if not ret:
+            print("Failed to retrieve frame from camera.")
+            stop_event.set()
+            break
+        with display_lock:
+            latest_frame = frame
+        put_latest(detect_queue, (started, frame), stats["detect"])
+        stats["capture"].record(time.monotonic() - started)
 
-        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-        cv2.putText(frame, name, (left + 6, bottom + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
 
-    cv2.imshow("Face Recognition", frame)
+def detect_stage():
+    """
+    Küçültülmüş karede HOG ile yüz tespiti yapar, kutuları tam çözünürlüğe
+    ölçekler ve izlere bağlar. Sadece yeni ya da kimliği eskimiş izler
+    kodlama aşamasına gönderilir.
+    """
+    while not stop_event.is_set():
+        try:
+            captured_at, frame = detect_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        started = time.monotonic()
+        small = cv2.resize(frame, (0, 0), fx=DETECTION_SCALE, fy=DETECTION_SCALE)
+        rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        small_locations = face_recognition.face_locations(rgb_small, model="hog")
+        locations = [
+            tuple(int(round(coordinate / DETECTION_SCALE)) for coordinate in location)
+            for location in small_locations
+        ]
+        to_encode = tracker.update(locations)
+        stats["detect"].record(time.monotonic() - started)
+
+        if to_encode:
+            put_latest(encode_queue, (captured_at, frame, to_encode), stats["encode"])
+
+
+def match_encoding(face_encoding):
+    """En yakın bilinen yüzü tek vektörel işlemle bulur."""
+    if len(known_face_matrix) == 0:
+        return "Unknown", None
+    distances = np.linalg.norm(known_face_matrix - face_encoding, axis=1)
+    best = int(np.argmin(distances))
+    if distances[best] <= MATCH_TOLERANCE:
+        return known_face_names[best], float(distances[best])
+    return "Unknown", float(distances[best])
+
+
+def encode_stage():
+    """
+    Tam çözünürlüklü karede izlerin yüzlerini kodlar ve eşleştirir. dlib
+    modelleri thread'ler arasında paylaşılmak üzere belgelenmediği için
+    kodlama tek bir thread'de yapılır.
+    """
+    while not stop_event.is_set():
+        try:
+            captured_at, frame, to_encode = encode_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        started = time.monotonic()
+        rgb_frame = np.ascontiguousarray(frame[:, :, ::-1])
+        for track_id, (top, right, bottom, left) in to_encode:
+            descriptor_started = time.monotonic()
+            rect = dlib.rectangle(left, top, right, bottom)
+            shape = pose_predictor(rgb_frame, rect)
+            face_encoding = np.array(
+                face_encoder.compute_face_descriptor(rgb_frame, shape, 1), dtype=np.float32
+            )
+            stats["descriptor"].record(time.monotonic() - descriptor_started)
+            name, distance = match_encoding(face_encoding)
+            # Aynı kişi izlendiği sürece sadece kimlik değiştiğinde bildirilir
+            if tracker.set_identity(track_id, name, distance):
+                if name != "Unknown":
+                    print(f"{name} recognized (track {track_id}).")
+                    uplink.send(name)
+                else:
+                    print(f"Face not recognized (track {track_id}).")
+        finished = time.monotonic()
+        stats["encode"].record(finished - started)
+        stats["end_to_end"].record(finished - captured_at)
+
+
+def print_stats():
+    """
+    Her aşamanın FPS, ortalama gecikme ve atılan kare sayısını yazdırır.
+    "descriptor" satırının FPS'i saniyedeki kodlayıcı çağrısı sayısıdır.
+    """
+    lines = []
+    for name, stage_stats in stats.items():
+        fps, latency_ms, dropped = stage_stats.snapshot()
+        lines.append(f"{name}: {fps:.1f} fps, {latency_ms:.1f} ms, {dropped} dropped")
+    print("[stats] " + " | ".join(lines))
+    print(f"[uplink] {uplink.stats()}")
+
+
+# -------------------------
+# ANA DÖNGÜ (görüntüleme ana thread'de kalmalı)
+# -------------------------
+threads = [
+    threading.Thread(target=capture_stage, name="capture", daemon=True),
+    threading.Thread(target=detect_stage, name="detect", daemon=True),
+    threading.Thread(target=encode_stage, name="encode", daemon=True),
+]
+for thread in threads:
+    thread.start()
+
+last_stats = time.monotonic()
+while not stop_event.is_set():
+    with display_lock:
+        frame = None if latest_frame is None else latest_frame.copy()
+    faces = tracker.visible_faces()
+
+    if frame is not None:
+        for track_id, (top, right, bottom, left), name in faces:
+            label = f"#{track_id} {name or '...'}"
+            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
+            cv2.putText(frame, label, (left + 6, bottom + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.imshow("Face Recognition", frame)
+
     if cv2.waitKey(1) & 0xFF == ord('q'):
+        stop_event.set()
         break
 
+    if time.monotonic() - last_stats >= STATS_INTERVAL:
+        print_stats()
+        last_stats = time.monotonic()
+
 # -------------------------
 # KAYNAKLARI SERBEST BIRAK
 # -------------------------
+for thread in threads:
+    thread.join(timeout=2)
+uplink.stop()
 video_capture.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.destroyAllWindows()
@@ -0,0 +1,140 @@
+import threading
+import time
+
+
+def box_iou(a, b):
+    """İki (top, right, bottom, left) kutusunun kesişim/birleşim oranı."""
+    top = max(a[0], b[0])
+    right = min(a[1], b[1])
+    bottom = min(a[2], b[2])
+    left = max(a[3], b[3])
+    if right <= left or bottom <= top:
+        return 0.0
+    intersection = (right - left) * (bottom - top)
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return intersection / float(area_a + area_b - intersection)
+
+
+class Track:
+    """Kareler boyunca takip edilen tek bir yüz."""
+
+    def __init__(self, track_id, box, now):
+        self.track_id = track_id
+        self.box = box
+        self.name = None          # None: henüz kodlanmadı
+        self.distance = None
+        self.identified_at = None
+        self.requested_at = None  # son kodlama isteği (kuyrukta atılmış olabilir)
+        self.last_seen = now
+        self.missed = 0
+
+
+class FaceTracker:
+    """
+    Tespit kutularını IoU ile önceki karedeki izlere bağlayan hafif takipçi.
+
+    Her yüz bir iz numarası alır; kodlama (compute_face_descriptor) sadece
+    iz yeniyse ya da kimliği identity_ttl saniyeden eskiyse istenir. Böylece
+    kapıda bekleyen biri her karede yeniden kodlanmaz. Tespit ve kodlama
+    farklı thread'lerde çalıştığı için tüm erişimler kilitlidir.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=5, identity_ttl=3.0, retry_interval=1.0):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.identity_ttl = identity_ttl
+        self.retry_interval = retry_interval
+        self._tracks = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def update(self, boxes, now=None):
+        """
+        Yeni karenin tespit kutularını izlere bağlar.
+
+        Args:
+            boxes (list): (top, right, bottom, left) kutuları
+            now (float, optional): time.monotonic() zamanı
+
+        Returns:
+            list: Kodlanması gereken (track_id, box) çiftleri
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            # En yüksek IoU'dan başlayarak açgözlü eşleştirme
+            pairs = []
+            for track_id, track in self._tracks.items():
+                for index, box in enumerate(boxes):
+                    iou = box_iou(track.box, box)
+                    if iou >= self.iou_threshold:
+                        pairs.append((iou, track_id, index))
+            pairs.sort(reverse=True)
+
+            matched_tracks = set()
+            matched_boxes = set()
+            for _, track_id, index in pairs:
+                if track_id in matched_tracks or index in matched_boxes:
+                    continue
+                track = self._tracks[track_id]
+                track.box = boxes[index]
+                track.last_seen = now
+                track.missed = 0
+                matched_tracks.add(track_id)
+                matched_boxes.add(index)
+
+            for track_id in list(self._tracks):
+                if track_id not in matched_tracks:
+                    track = self._tracks[track_id]
+                    track.missed += 1
+                    if track.missed > self.max_missed:
+                        del self._tracks[track_id]
+
+            for index, box in enumerate(boxes):
+                if index not in matched_boxes:
+                    track = Track(self._next_id, box, now)
+                    self._tracks[track.track_id] = track
+                    self._next_id += 1
+
+            to_encode = []
+            for track in self._tracks.values():
+                if track.missed == 0 and self._needs_encoding(track, now):
+                    track.requested_at = now
+                    to_encode.append((track.track_id, track.box))
+            return to_encode
+
+    def _needs_encoding(self, track, now):
+        if track.requested_at is not None and now - track.requested_at < self.retry_interval:
+            return False
+        if track.identified_at is None:
+            return True
+        return now - track.identified_at >= self.identity_ttl
+
+    def set_identity(self, track_id, name, distance, now=None):
+        """
+        Kodlama sonucunu ize yazar.
+
+        Returns:
+            bool: İzin kimliği değiştiyse True (iz silinmişse False)
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            track = self._tracks.get(track_id)
+            if track is None:
+                return False
+            changed = track.name != name
+            track.name = name
+            track.distance = distance
+            track.identified_at = now
+            return changed
+
+    def visible_faces(self):
+        """Görüntüleme için bu karede görülen izleri döner."""
+        with self._lock:
+            return [
+                (track.track_id, track.box, track.name)
+                for track in self._tracks.values()
+                if track.missed == 0
+            ]
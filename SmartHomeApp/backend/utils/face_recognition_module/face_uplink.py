@@ -0,0 +1,135 @@
+import collections
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FaceUplink:
+    """
+    Tanıma olaylarını backend'e arka plandan gönderen istemci.
+
+    Olaylar sınırlı bir kuyruğa eklenir (dolarsa en eski atılır) ve tek bir
+    thread tarafından keep-alive bağlantılı bir Session ile gönderilir; hata
+    durumunda üstel bekleme ile tekrar denenir. Aynı kişi debounce saniyesi
+    içinde tekrar tanınırsa olay hiç kuyruğa alınmaz. send() ağı hiç beklemez.
+    """
+
+    def __init__(self, url, device_id, max_queue=32, debounce=10.0,
+                 max_retries=3, backoff=0.2, max_backoff=2.0, timeout=2.0):
+        self.url = url
+        self.device_id = device_id
+        self.debounce = debounce
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._queue = collections.deque(maxlen=max_queue)
+        self._last_sent = {}  # kimlik -> son kuyruğa alınma zamanı
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self.counters = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "debounced": 0, "retries": 0}
+        self.last_latency_ms = None
+
+        self._thread = threading.Thread(target=self._run, name="face-uplink", daemon=True)
+        self._thread.start()
+
+    def send(self, name, recognized=True):
+        """
+        Bir tanıma olayını gönderim kuyruğuna ekler.
+
+        Args:
+            name (str): Tanınan kişinin adı
+            recognized (bool): Yüz tanındı mı
+
+        Returns:
+            bool: Olay kuyruğa alındıysa True, debounce edildiyse False
+        """
+        now = time.monotonic()
+        event = {
+            "device_id": self.device_id,
+            "recognized": recognized,
+            "name": name,
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        }
+        with self._lock:
+            last = self._last_sent.get(name)
+            if last is not None and now - last < self.debounce:
+                self.counters["debounced"] += 1
+                return False
+            self._last_sent[name] = now
+            if len(self._queue) == self._queue.maxlen:
+                self.counters["dropped"] += 1
+            self._queue.append((now, event))
+            self.counters["queued"] += 1
+            self._wakeup.notify()
+        return True
+
+    def stats(self):
+        """Gönderim sayaçlarını döner."""
+        with self._lock:
+            result = dict(self.counters)
+            result["pending"] = len(self._queue)
+            result["last_latency_ms"] = self.last_latency_ms
+        return result
+
+    def stop(self, timeout=2.0):
+        """Thread'i durdurur; kuyrukta kalanlar timeout süresince gönderilmeye çalışılır."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._queue:
+                    break
+            time.sleep(0.05)
+        self._stop.set()
+        with self._lock:
+            self._wakeup.notify()
+        self._thread.join(timeout=timeout)
+        self.session.close()
+
+    def _post(self, event):
+        """Olayı gönderir; geçici hatalarda üstel beklemeyle tekrar dener."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, json=event, timeout=self.timeout)
+                if response.status_code < 500:
+                    if response.status_code >= 400:
+                        print(f"Backend rejected face event: {response.status_code} {response.text}")
+                        return False
+                    return True
+                print(f"Backend error {response.status_code}, retrying...")
+            except requests.RequestException as e:
+                print("Error contacting backend:", e)
+            if attempt == self.max_retries or self._stop.is_set():
+                break
+            with self._lock:
+                self.counters["retries"] += 1
+            self._stop.wait(min(self.backoff * (2 ** attempt), self.max_backoff))
+        return False
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._stop.is_set():
+                    self._wakeup.wait()
+                if not self._queue:
+                    return
+                queued_at, event = self._queue.popleft()
+            delivered = self._post(event)
+            with self._lock:
+                if delivered:
+                    self.counters["sent"] += 1
+                    self.last_latency_ms = round((time.monotonic() - queued_at) * 1000.0, 1)
+                else:
+                    self.counters["failed"] += 1
+                    # Gönderilemeyen kimlik debounce'a takılmasın, bir sonraki tanımada tekrar denensin
+                    self._last_sent.pop(event["name"], None)
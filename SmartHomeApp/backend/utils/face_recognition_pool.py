@@ -0,0 +1,165 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Her worker process'inde bir kez oluşturulan, galerisi hazır modül
+_worker_module = None
+
+
+def _init_worker(index_kind, nprobe):
+    """Worker açılırken yüz modülünü ve galeriyi yükler (sonraki isteklerde hazırdır)."""
+    global _worker_module
+    from utils.face_index import create_face_index
+    from utils.face_recognition_module import FaceRecognitionModule
+    # Galeri ana process'te eşitlenir; worker'lar sadece depodan okur
+    _worker_module = FaceRecognitionModule(
+        index=create_face_index(index_kind, nprobe=nprobe),
+        sync=False
+    )
+
+
+def _decode_frame(data, max_width):
+    """
+    JPEG baytlarını çözer ve gerekirse küçültür.
+
+    Returns:
+        tuple: (RGB görüntü, ölçek, orijinal genişlik, orijinal yükseklik)
+    """
+    import cv2
+    import numpy as np
+
+    # np.frombuffer kopyalamadan baytları görüntüler
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Görüntü çözülemedi")
+
+    height, width = image.shape[:2]
+    scale = 1.0
+    if max_width and width > max_width:
+        scale = max_width / float(width)
+        image = cv2.resize(image, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB), scale, width, height
+
+
+def _rescale_faces(faces, scale):
+    # Konumları orijinal çözünürlüğe çevirir
+    for face in faces:
+        face["location"] = [int(round(coordinate / scale)) for coordinate in face["location"]]
+    return faces
+
+
+def _recognize_jpeg(data, max_width):
+    """
+    Worker'da çalışır: JPEG baytlarını çözer, küçültür ve yüzleri tanır.
+
+    Returns:
+        dict: {"width", "height", "faces"}; konumlar orijinal çözünürlüktedir
+    """
+    rgb, scale, width, height = _decode_frame(data, max_width)
+    faces = _rescale_faces(_worker_module.recognize_faces(rgb), scale)
+    return {"width": width, "height": height, "faces": faces}
+
+
+def _recognize_jpeg_batch(datas, max_width):
+    """
+    Worker'da çalışır: birden fazla kareyi tek bir toplu tanımayla işler.
+
+    Returns:
+        dict: {"frames": [{"width", "height", "faces"}], "identity": birleşik karar}
+    """
+    decoded = [_decode_frame(data, max_width) for data in datas]
+    result = _worker_module.recognize_batch([rgb for rgb, _, _, _ in decoded])
+    frames = [
+        {"width": width, "height": height, "faces": _rescale_faces(faces, scale)}
+        for (_, scale, width, height), faces in zip(decoded, result["frames"])
+    ]
+    return {"frames": frames, "identity": result["identity"]}
+
+
+class FaceRecognitionPool:
+    """
+    Yüz tespiti ve kodlamayı ayrı process'lerde çalıştıran havuz.
+
+    dlib çağrıları Flask istek thread'lerinde GIL'i tutmaz; her worker kendi
+    galerisini açılışta bir kez yükler. Havuz ilk istekte oluşturulur.
+    """
+
+    def __init__(self, max_workers=2, index_kind="exact", nprobe=8, max_width=640):
+        self.max_workers = max_workers
+        self.index_kind = index_kind
+        self.nprobe = nprobe
+        self.max_width = max_width
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Havuz istek thread'inden açılır; çok thread'li process'i fork
+                # etmek (dinleyiciler, kuyruklar) devralınan kilitlerde takılabilir
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.index_kind, self.nprobe)
+                )
+                logger.info(f"Yüz tanıma havuzu başlatıldı ({self.max_workers} worker)")
+            return self._executor
+
+    def _reset_executor(self, broken):
+        """Çöken havuzu kapatır; sonraki istek yeni worker'larla açılır."""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                logger.error("Yüz tanıma havuzu çöktü, yeniden başlatılıyor")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args)
+
+    def _call(self, fn, args, timeout=None):
+        # Worker iş sırasında ölürse (örn. dlib bellek hatası) havuz bir kez
+        # yeniden açılıp iş tekrar denenir
+        for attempt in range(2):
+            executor, future = self._submit(fn, *args)
+            try:
+                return future.result(timeout=timeout)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                if attempt:
+                    raise
+
+    def submit(self, jpeg_bytes):
+        """
+        Bir JPEG karesini tanıma için havuza gönderir.
+
+        Returns:
+            concurrent.futures.Future: _recognize_jpeg sonucu
+        """
+        return self._submit(_recognize_jpeg, jpeg_bytes, self.max_width)[1]
+
+    def recognize(self, jpeg_bytes, timeout=None):
+        """Kareyi tanır ve sonucu bekler."""
+        return self._call(_recognize_jpeg, (jpeg_bytes, self.max_width), timeout)
+
+    def recognize_batch(self, jpeg_frames, timeout=None):
+        """Birden fazla kareyi tek bir worker'da toplu tanır ve sonucu bekler."""
+        return self._call(_recognize_jpeg_batch, (list(jpeg_frames), self.max_width), timeout)
+
+    def shutdown(self):
+        """Worker process'lerini kapatır."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
@@ -0,0 +1,62 @@
+# utils/firebase_listener.py: (alt ağaç başına tek Firebase listen() aboneliği)
+
+import logging
+import threading
+from firebase_admin import db
+
+logger = logging.getLogger(__name__)
+
+
+class SubtreeListener:
+    """
+    Bir Firebase alt ağacını tek bir listen() bağlantısıyla dinler ve gelen
+    olayları kayıtlı tüm callback'lere dağıtır.
+
+    Callback imzası: callback(root, event_type, path, data)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._callbacks = []
+        self._registration = None
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """Olayları alacak yeni bir callback ekler."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """Kayıtlı bir callback'i çıkarır."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @property
+    def running(self):
+        return self._registration is not None
+
+    def start(self):
+        """Dinlemeyi başlatır (zaten çalışıyorsa bir şey yapmaz)."""
+        with self._lock:
+            if self._registration is not None:
+                return
+            self._registration = db.reference(self.path).listen(self._dispatch)
+        logger.info(f"Firebase dinleyicisi başlatıldı: {self.path}")
+
+    def stop(self):
+        """Dinlemeyi durdurur."""
+        with self._lock:
+            registration, self._registration = self._registration, None
+        if registration is not None:
+            registration.close()
+            logger.info(f"Firebase dinleyicisi durduruldu: {self.path}")
+
+    def _dispatch(self, event):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(self.path, event.event_type, event.path, event.data)
+            except Exception as e:
+                logger.error(f"Firebase olayı işlenirken hata ({self.path}): {str(e)}")
@@ -0,0 +1,25 @@
+# utils/firebase_values.py: (Firebase sunucu değerleri için yardımcılar)
+
+import time
+
+# Firebase Realtime Database yazma sırasında sunucu saatiyle (epoch ms) değiştirir
+SERVER_TIMESTAMP = {".sv": "timestamp"}
+
+
+def local_timestamp_ms():
+    """Sunucu zaman damgasının yerel yaklaşığını (epoch ms) döner."""
+    return int(time.time() * 1000)
+
+
+def resolve_server_values(data, timestamp_ms=None):
+    """
+    Yazılan verideki SERVER_TIMESTAMP yer tutucularını yerel yaklaşıkla
+    değiştirir; önbelleğe ve API yanıtlarına yazılacak kopyayı döner.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = local_timestamp_ms()
+    if data == SERVER_TIMESTAMP:
+        return timestamp_ms
+    if isinstance(data, dict):
+        return {key: resolve_server_values(value, timestamp_ms) for key, value in data.items()}
+    return data
@@ -0,0 +1,180 @@
+# utils/notification_dispatcher.py: (FCM bildirimleri için arka plan gönderim kuyruğu)
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from firebase_admin import messaging
+from firebase_admin import exceptions as firebase_exceptions
+
+logger = logging.getLogger(__name__)
+
+# messaging.send_each yeni SDK'larda var; eski sürümlerde send_all kullanılır
+_send_batch = getattr(messaging, "send_each", None) or messaging.send_all
+
+# Tekrar denemekle düzelmeyen hatalar (geçersiz/kayıtsız token, hatalı mesaj)
+_PERMANENT_ERRORS = (
+    messaging.UnregisteredError,
+    messaging.SenderIdMismatchError,
+    firebase_exceptions.InvalidArgumentError,
+    firebase_exceptions.NotFoundError
+)
+
+
+class NotificationDispatcher:
+    """
+    Push bildirimlerini istek thread'inden ayırır.
+
+    dispatch() mesajı kuyruğa ekleyip hemen döner. Arka plan thread'i kısa
+    bir pencere boyunca biriken mesajları tek bir send_each/send_all
+    çağrısıyla gönderir; başarısız mesajlar üstel bekleme ile tekrar
+    denenir. Bildirim kaydı da aynı thread'de veritabanına yazılır.
+    """
+
+    def __init__(self, notification_repository, batch_window_ms=200, max_batch=500,
+                 max_retries=5, base_backoff=0.5, max_backoff=60.0, max_queue=1000):
+        self.notification_repository = notification_repository
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = min(max_batch, 500)  # FCM toplu gönderim sınırı
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_queue = max_queue
+        self._queue = deque()    # (hazır olma zamanı, deneme, mesaj)
+        self._records = deque()  # (kayıt, deneme)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._running = True
+        # Art arda başarısız kayıt yazma turu sayısı (bekleme süresi için)
+        self._record_failures = 0
+        self.counters = {"queued": 0, "sent": 0, "failed": 0, "retried": 0, "dropped": 0, "batches": 0, "saved": 0}
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def dispatch(self, message, record=None):
+        """
+        Bir push mesajını ve opsiyonel bildirim kaydını kuyruğa ekler.
+
+        Args:
+            message (messaging.Message): Gönderilecek mesaj (None ise sadece kayıt yazılır)
+            record (dict, optional): NotificationRepository.save_notification argümanları
+        """
+        with self._lock:
+            if message is not None:
+                if len(self._queue) >= self.max_queue:
+                    # Kuyruk taşarsa en eski mesaj atılır, ingest bloklanmaz
+                    self._queue.popleft()
+                    self.counters["dropped"] += 1
+                self._queue.append((time.monotonic(), 0, message))
+                self.counters["queued"] += 1
+            if record is not None:
+                self._records.append((record, 0))
+            self._wakeup.notify()
+
+    def stats(self):
+        """Gönderim sayaçlarını döner."""
+        with self._lock:
+            result = dict(self.counters)
+            result["pending"] = len(self._queue)
+            result["pending_records"] = len(self._records)
+        return result
+
+    def stop(self, timeout=5.0):
+        """Thread'i durdurur; kuyrukta kalan hazır mesajlar son bir kez gönderilir."""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        self._thread.join(timeout=timeout)
+
+    def _backoff(self, attempt):
+        delay = min(self.base_backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    def _take_batch(self):
+        # Kilit tutulurken çağrılır: hazır olan mesajlardan en fazla max_batch tanesi
+        now = time.monotonic()
+        batch = []
+        waiting = deque()
+        while self._queue and len(batch) < self.max_batch:
+            item = self._queue.popleft()
+            if item[0] <= now:
+                batch.append(item)
+            else:
+                waiting.append(item)
+        self._queue.extendleft(reversed(waiting))
+        return batch
+
+    def _next_ready_in(self):
+        # Kilit tutulurken çağrılır: en yakın tekrar denemeye kalan süre
+        if not self._queue:
+            return None
+        return max(0.0, min(item[0] for item in self._queue) - time.monotonic())
+
+    def _send(self, batch):
+        """Bir grup mesajı tek çağrıyla gönderir, başarısızları tekrar kuyruğa alır."""
+        messages = [message for _, _, message in batch]
+        try:
+            response = _send_batch(messages)
+            outcomes = [(result.success, result.exception) for result in response.responses]
+        except Exception as e:
+            # Ağ hatası vb.: tüm grup başarısız sayılır
+            outcomes = [(False, e)] * len(batch)
+
+        retry = []
+        with self._lock:
+            self.counters["batches"] += 1
+            for (_, attempt, message), (success, error) in zip(batch, outcomes):
+                if success:
+                    self.counters["sent"] += 1
+                elif attempt < self.max_retries and self._running and not isinstance(error, _PERMANENT_ERRORS):
+                    self.counters["retried"] += 1
+                    retry.append((time.monotonic() + self._backoff(attempt), attempt + 1, message))
+                else:
+                    self.counters["failed"] += 1
+                    logger.error(f"Bildirim gönderilemedi ({attempt + 1} deneme): {str(error)}")
+            self._queue.extend(retry)
+        if len(retry) < len(batch):
+            logger.info(f"{len(batch) - len(retry)} bildirim işlendi, {len(retry)} tekrar denenecek")
+
+    def _save_records(self):
+        """Bekleyen bildirim kayıtlarını veritabanına yazar."""
+        with self._lock:
+            records, self._records = self._records, deque()
+        failed = deque()
+        for record, attempt in records:
+            try:
+                self.notification_repository.save_notification(**record)
+                with self._lock:
+                    self.counters["saved"] += 1
+            except Exception as e:
+                if attempt < self.max_retries:
+                    failed.append((record, attempt + 1))
+                else:
+                    logger.error(f"Bildirim kaydı yazılamadı: {str(e)}")
+        if failed:
+            with self._lock:
+                self._records.extendleft(reversed(failed))
+            self._record_failures = min(self._record_failures + 1, self.max_retries)
+        else:
+            self._record_failures = 0
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._running and not self._records and (self._next_ready_in() is None or self._next_ready_in() > 0):
+                    self._wakeup.wait(self._next_ready_in())
+                running = self._running
+            if running:
+                # Pencere boyunca gelen diğer mesajlar da aynı gruba girsin
+                time.sleep(self.batch_window)
+            with self._lock:
+                batch = self._take_batch()
+            if batch:
+                self._send(batch)
+            if self._records:
+                self._save_records()
+                if self._records and running:
+                    time.sleep(self._backoff(self._record_failures))
+            if not running:
+                return
@@ -0,0 +1,63 @@
+# utils/push_id.py: (Firebase push() ile aynı formatta yerel anahtar üretimi)
+
+import random
+import threading
+import time
+
+# Firebase push anahtarlarının alfabesi; sözlük sırası zaman sırasıdır
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+_lock = threading.Lock()
+_last_push_time = 0
+_last_rand_chars = [0] * 12
+_random = random.SystemRandom()
+
+
+def generate_push_id(timestamp_ms=None):
+    """
+    Firebase push() ile aynı formatta 20 karakterlik bir anahtar üretir.
+
+    İlk 8 karakter milisaniye zaman damgası, kalan 12 karakter rastgeledir.
+    Aynı milisaniyede üretilen anahtarlar rastgele kısım artırılarak sıralı
+    tutulur. Anahtar yerel üretildiği için kayıt, başka yollarla birlikte tek
+    bir multi-path update içinde yazılabilir.
+    """
+    global _last_push_time, _last_rand_chars
+    now = int(time.time() * 1000) if timestamp_ms is None else int(timestamp_ms)
+    with _lock:
+        if now == _last_push_time:
+            # Aynı milisaniye: rastgele kısmı bir artır
+            index = 11
+            while index >= 0 and _last_rand_chars[index] == 63:
+                _last_rand_chars[index] = 0
+                index -= 1
+            if index >= 0:
+                _last_rand_chars[index] += 1
+        else:
+            _last_rand_chars = [_random.randrange(64) for _ in range(12)]
+        _last_push_time = now
+        rand_chars = list(_last_rand_chars)
+
+    return push_id_for_time(now) + "".join(PUSH_CHARS[c] for c in rand_chars)
+
+
+def push_id_timestamp(push_id):
+    """Bir push anahtarının içindeki zaman damgasını (epoch ms) döner."""
+    timestamp = 0
+    for char in push_id[:8]:
+        timestamp = timestamp * 64 + PUSH_CHARS.index(char)
+    return timestamp
+
+
+def push_id_for_time(timestamp_ms):
+    """
+    Anahtarların 8 karakterlik zaman önekini döner. Önek, verilen zamandan
+    önce üretilmiş tüm anahtarlardan büyük, o anda ve sonra üretilenlerden
+    küçüktür; bu yüzden end_at/start_at sorgularında zaman imleci olarak
+    kullanılabilir.
+    """
+    time_chars = []
+    for _ in range(8):
+        time_chars.append(PUSH_CHARS[timestamp_ms % 64])
+        timestamp_ms //= 64
+    return "".join(reversed(time_chars))
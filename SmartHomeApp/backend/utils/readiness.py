@@ -0,0 +1,55 @@
+# utils/readiness.py: (arka planda hazırlanan alt sistemlerin durum takibi)
+
+import threading
+import time
+
+
+class ReadinessTracker:
+    """
+    Arka planda ısınan alt sistemlerin (Firebase, Face ID, ...) durumunu tutar.
+
+    Zorunlu bileşenlerin hepsi hazır olduğunda servis trafiğe hazırdır;
+    zorunlu olmayanlar sadece raporlanır.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, required=True):
+        """Bir bileşeni "pending" durumunda kaydeder."""
+        with self._lock:
+            self._components[name] = {
+                "status": "pending",
+                "required": required,
+                "error": None,
+                "since": time.time()
+            }
+
+    def mark_ready(self, name):
+        """Bileşeni hazır olarak işaretler."""
+        self._set(name, "ready", None)
+
+    def mark_failed(self, name, error):
+        """Bileşeni hatalı olarak işaretler (tekrar denenebilir)."""
+        self._set(name, "failed", str(error))
+
+    def _set(self, name, status, error):
+        with self._lock:
+            component = self._components.setdefault(name, {"required": True})
+            component.update({"status": status, "error": error, "since": time.time()})
+
+    def is_ready(self):
+        """Tüm zorunlu bileşenler hazırsa True."""
+        with self._lock:
+            return all(
+                component["status"] == "ready"
+                for component in self._components.values()
+                if component["required"]
+            )
+
+    def snapshot(self):
+        """Bileşenlerin durumunun kopyasını döner."""
+        with self._lock:
+            return {name: dict(component) for name, component in self._components.items()}
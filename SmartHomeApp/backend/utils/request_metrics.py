@@ -0,0 +1,21 @@
+# utils/request_metrics.py: (istek başına backend round trip sayacı)
+
+import contextvars
+
+# Her istek kendi bağlamında sayılır; Flask istek thread'leri birbirini etkilemez
+_round_trips = contextvars.ContextVar("backend_round_trips", default=0)
+
+
+def reset_round_trips():
+    """Mevcut isteğin round trip sayacını sıfırlar."""
+    _round_trips.set(0)
+
+
+def count_round_trip(count=1):
+    """Firebase'e yapılan her çağrıda sayacı artırır."""
+    _round_trips.set(_round_trips.get() + count)
+
+
+def get_round_trips():
+    """Mevcut istekte yapılan Firebase round trip sayısını döner."""
+    return _round_trips.get()
@@ -0,0 +1,204 @@
+# utils/retention_job.py: (bildirim ve komut geçmişi için saklama/sıkıştırma işi)
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from utils.push_id import push_id_for_time
+from utils.request_metrics import count_round_trip
+from repositories.notification_repository import NotificationRepository, UNREAD_INDEX_PATH, UNREAD_COUNTER_PATH, unread_increment
+
+try:
+    import fcntl
+except ImportError:  # Windows: process'ler arası kilit yok
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Bir koleksiyonun saklama kuralı.
+
+    Args:
+        name (str): Koleksiyon adı (arşiv dizini adı)
+        path (str): Firebase yolu (örn. "command_history")
+        max_age (float, optional): Saniye cinsinden en fazla yaş
+        max_count (int, optional): Cihaz başına en fazla kayıt
+        device_depth (int): Kayıtların yolun kaç seviye altında olduğu
+            (command_history/{room}/{type} için 2, notifications için 0)
+    """
+
+    def __init__(self, name, path, max_age=None, max_count=None, device_depth=0):
+        self.name = name
+        self.path = path
+        self.max_age = max_age
+        self.max_count = max_count
+        self.device_depth = device_depth
+
+
+class RetentionJob:
+    """
+    Süresi dolan ya da cihaz başına sınırı aşan kayıtları yerel sıkıştırılmış
+    segment dosyalarına arşivler ve Firebase'den toplu olarak siler.
+
+    Anahtarlar push ID olduğu için anahtar sırası zaman sırasıdır: silinecek
+    kayıtlar her zaman en eski anahtarlardır. Yaş sınırı push ID zaman
+    önekiyle, sayı sınırı sığ (shallow) anahtar listesiyle hesaplanır; kayıt
+    değerleri sadece silinecek olanlar için, batch_size'lık sayfalarla okunur.
+    Her sayfa önce arşive yazılıp diske alınır, sonra tek bir multi-path
+    update ile silinir.
+    """
+
+    def __init__(self, database, archive_dir, policies, interval=86400, batch_size=500, initial_delay=300):
+        self.db = database
+        # Silinen okunmamış bildirimler indeks üzerinden düşülür
+        self.notification_repository = NotificationRepository(database)
+        self.archive_dir = archive_dir
+        self.policies = policies
+        self.interval = interval
+        self.batch_size = batch_size
+        self.initial_delay = initial_delay
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        if not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+
+    def start(self):
+        """Periyodik çalışmayı arka plan thread'inde başlatır."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="retention-job", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Periyodik çalışmayı durdurur."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_once(self, now=None):
+        """
+        Tüm kuralları bir kez uygular. Aynı makinedeki başka bir worker iş
+        başındaysa hiçbir şey yapmaz.
+
+        Returns:
+            dict: Koleksiyon başına arşivlenip silinen kayıt sayısı (atlandıysa None)
+        """
+        if now is None:
+            now = time.time()
+        with open(os.path.join(self.archive_dir, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    logger.info("Saklama işi başka bir worker'da çalışıyor, atlandı")
+                    return None
+            try:
+                results = {}
+                for policy in self.policies:
+                    try:
+                        results[policy.name] = self._apply(policy, now)
+                    except Exception as e:
+                        logger.error(f"Saklama kuralı uygulanırken hata ({policy.name}): {str(e)}")
+                        results[policy.name] = 0
+                self.last_run = now
+                logger.info(f"Saklama işi tamamlandı: {results}")
+                return results
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _device_paths(self, path, depth):
+        # Her seviye sığ okunur: sadece anahtarlar iner
+        paths = [path]
+        for _ in range(depth):
+            children = []
+            for parent in paths:
+                count_round_trip()
+                keys = self.db.child(parent).get(shallow=True) or {}
+                children.extend(f"{parent}/{key}" for key in sorted(keys))
+            paths = children
+        return paths
+
+    def _apply(self, policy, now):
+        unread_indexed = policy.path == "notifications"
+        cutoff = push_id_for_time(int((now - policy.max_age) * 1000)) if policy.max_age else None
+        segment = None
+        removed = 0
+        try:
+            for device_path in self._device_paths(policy.path, policy.device_depth):
+                count_round_trip()
+                keys = sorted((self.db.child(device_path).get(shallow=True) or {}).keys())
+                remove_count = 0
+                if cutoff is not None:
+                    remove_count = sum(1 for key in keys if key < cutoff)
+                if policy.max_count is not None:
+                    remove_count = max(remove_count, len(keys) - policy.max_count)
+                if remove_count <= 0:
+                    continue
+
+                if segment is None:
+                    segment = self._open_segment(policy.name, now)
+                last_key = keys[remove_count - 1]
+                while True:
+                    count_round_trip()
+                    batch = self.db.child(device_path).order_by_key().end_at(last_key) \
+                        .limit_to_first(self.batch_size).get() or {}
+                    if not batch:
+                        break
+                    self._archive(segment, device_path, batch, now)
+                    self._delete(device_path, batch, unread_indexed)
+                    removed += len(batch)
+                    if len(batch) < self.batch_size:
+                        break
+        finally:
+            if segment is not None:
+                segment.close()
+        return removed
+
+    def _open_segment(self, name, now):
+        collection_dir = os.path.join(self.archive_dir, name)
+        if not os.path.exists(collection_dir):
+            os.makedirs(collection_dir)
+        filename = f"{datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.jsonl.gz"
+        return gzip.open(os.path.join(collection_dir, filename), "at", encoding="utf-8")
+
+    def _archive(self, segment, device_path, batch, now):
+        """Bir sayfayı segment dosyasına ekler ve silmeden önce diske alır."""
+        archived_at = datetime.fromtimestamp(now).isoformat()
+        for key in sorted(batch):
+            segment.write(json.dumps({
+                "path": f"{device_path}/{key}",
+                "value": batch[key],
+                "archived_at": archived_at
+            }, ensure_ascii=False) + "\n")
+        segment.flush()
+        os.fsync(segment.fileno())
+
+    def _delete(self, device_path, batch, unread_indexed=False):
+        """Bir sayfayı tek bir multi-path update ile siler."""
+        updates = {f"{device_path}/{key}": None for key in batch}
+        if unread_indexed:
+            # Sayaç, okunmamış indeksinde gerçekten bulunan kayıtlar kadar azalır
+            unread = self.notification_repository.unread_ids(list(batch))
+            for key in unread:
+                updates[f"{UNREAD_INDEX_PATH}/{key}"] = None
+            if unread:
+                updates[UNREAD_COUNTER_PATH] = unread_increment(-len(unread))
+        count_round_trip()
+        self.db.update(updates)
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Saklama işi çalışırken hata: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,256 @@
+# utils/state_cache.py: (sensors/* ve commands/* için süreç içi durum önbelleği)
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from utils.request_metrics import count_round_trip
+
+logger = logging.getLogger(__name__)
+
+# Önbellek girdileri "<kök>/<oda>/<tip>" derinliğinde tutulur
+ENTRY_DEPTH = 3
+
+
+def split_path(path):
+    """'/sensors/salon/gas/' gibi bir yolu parçalarına ayırır."""
+    return [segment for segment in str(path).split("/") if segment]
+
+
+def join_path(*parts):
+    """Yol parçalarını normalize ederek birleştirir."""
+    segments = []
+    for part in parts:
+        segments.extend(split_path(part))
+    return "/".join(segments)
+
+
+def read_through(database, cache, path):
+    """Bir düğümü önce önbellekten, yoksa Firebase'den okuyup önbelleğe yazar."""
+    if cache is not None:
+        hit, value = cache.get(path)
+        if hit:
+            return value
+    count_round_trip()
+    value = database.child(path).get()
+    if cache is not None:
+        cache.put(path, value)
+    return value
+
+
+def read_subtree_through(database, cache, path):
+    """Bir alt ağacı önce önbellekten, yoksa tek okumada Firebase'den getirir."""
+    if cache is not None:
+        hit, value = cache.get_subtree(path)
+        if hit:
+            return value
+    count_round_trip()
+    value = database.child(path).get()
+    if cache is not None:
+        cache.put_subtree(path, value)
+    return value
+
+
+class StateCache:
+    """
+    Firebase durum düğümleri için write-through, TTL'li ve boyutu sınırlı önbellek.
+
+    Girdiler "<kök>/<oda>/<tip>" yollarında tutulur. Bir oda ya da kökün tamamı
+    okunduğunda o önek "tam" olarak işaretlenir ve alt ağaç istekleri
+    Firebase'e gitmeden bellekten oluşturulur. Olmayan düğümler de (None)
+    önbelleğe alınır, böylece boş sensörler her istekte tekrar sorgulanmaz.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (value, expires_at)
+        self._children = {}  # önek -> alt yollar kümesi
+        self._complete = {}  # önek -> expires_at
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """
+        Önbellekteki değeri döner.
+
+        Returns:
+            tuple: (bulundu_mu, değer)
+        """
+        path = join_path(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, path, value):
+        """
+        Bir düğümün değerini yazar. Girdi derinliğinden sığ yollar alt ağaç,
+        derin yollar ise ilgili girdinin geçersiz kılınması olarak işlenir.
+        """
+        segments = split_path(path)
+        if len(segments) < ENTRY_DEPTH:
+            self.put_subtree(path, value)
+            return
+        with self._lock:
+            if len(segments) > ENTRY_DEPTH:
+                # Girdinin sadece bir alanı değişti, tamamını bilmiyoruz
+                self._drop_entry("/".join(segments[:ENTRY_DEPTH]))
+                return
+            self._store_entry("/".join(segments), value)
+            self._evict()
+
+    def get_subtree(self, prefix):
+        """
+        Tam olarak önbelleğe alınmış bir alt ağacı dict olarak döner.
+
+        Returns:
+            tuple: (bulundu_mu, dict)
+        """
+        prefix = join_path(prefix)
+        with self._lock:
+            now = time.monotonic()
+            subtree = self._assemble(prefix, now)
+            if subtree is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, subtree
+
+    def put_subtree(self, prefix, data):
+        """
+        Bir alt ağacın tamamını yazar; verideki olmayan çocuklar silinmiş sayılır.
+        """
+        prefix = join_path(prefix)
+        if not prefix:
+            return
+        with self._lock:
+            self._replace_subtree(prefix, data, time.monotonic() + self.ttl)
+            self._evict()
+
+    def invalidate(self, path):
+        """Bir yolu ve altındaki tüm girdileri önbellekten çıkarır."""
+        path = join_path(path)
+        with self._lock:
+            if len(split_path(path)) >= ENTRY_DEPTH:
+                self._drop_entry("/".join(split_path(path)[:ENTRY_DEPTH]))
+                return
+            for child in list(self._children.get(path, ())):
+                self.invalidate(child)
+            self._complete.pop(path, None)
+            self._unmark_ancestors(path)
+
+    def clear(self):
+        """Önbelleği tamamen boşaltır."""
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+            self._complete.clear()
+
+    def apply_event(self, root, event_type, path, data):
+        """
+        Firebase listen() olayını önbelleğe uygular.
+
+        Args:
+            root (str): Dinlenen referansın yolu (örn. "sensors")
+            event_type (str): "put" veya "patch"
+            path (str): Olayın köke göre yolu
+            data: Olay verisi
+        """
+        full_path = join_path(root, path)
+        if event_type == "put":
+            self.put(full_path, data)
+        elif event_type == "patch" and isinstance(data, dict):
+            for key, value in data.items():
+                self.put(join_path(full_path, key), value)
+        else:
+            self.invalidate(full_path)
+
+    def stats(self):
+        """Önbellek istatistiklerini döner."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    # -------------------------
+    # İç yardımcılar (kilit tutulurken çağrılır)
+    # -------------------------
+    def _store_entry(self, path, value, expires_at=None):
+        if expires_at is None:
+            expires_at = time.monotonic() + self.ttl
+        self._entries[path] = (value, expires_at)
+        self._entries.move_to_end(path)
+        segments = path.split("/")
+        for depth in range(1, len(segments)):
+            parent = "/".join(segments[:depth])
+            self._children.setdefault(parent, set()).add("/".join(segments[:depth + 1]))
+
+    def _drop_entry(self, path):
+        self._entries.pop(path, None)
+        self._unmark_ancestors(path)
+
+    def _unmark_ancestors(self, path):
+        segments = path.split("/")
+        for depth in range(1, len(segments)):
+            self._complete.pop("/".join(segments[:depth]), None)
+
+    def _replace_subtree(self, prefix, data, expires_at):
+        children = data if isinstance(data, dict) else {}
+        depth = len(prefix.split("/"))
+        # Veride olmayan eski çocukları temizle
+        for child in list(self._children.get(prefix, ())):
+            if child.rsplit("/", 1)[-1] not in children:
+                self._remove_subtree(child)
+        for key, value in children.items():
+            child = f"{prefix}/{key}"
+            if depth + 1 >= ENTRY_DEPTH:
+                self._store_entry(child, value, expires_at)
+            else:
+                self._replace_subtree(child, value, expires_at)
+        self._children.setdefault(prefix, set()).update(f"{prefix}/{key}" for key in children)
+        self._complete[prefix] = expires_at
+
+    def _remove_subtree(self, path):
+        for child in list(self._children.pop(path, ())):
+            self._remove_subtree(child)
+        self._entries.pop(path, None)
+        self._complete.pop(path, None)
+        parent = path.rsplit("/", 1)[0] if "/" in path else None
+        if parent and parent in self._children:
+            self._children[parent].discard(path)
+
+    def _assemble(self, prefix, now):
+        expires_at = self._complete.get(prefix)
+        if expires_at is None or expires_at < now:
+            return None
+        subtree = {}
+        for child in self._children.get(prefix, ()):
+            key = child.rsplit("/", 1)[-1]
+            if len(child.split("/")) >= ENTRY_DEPTH:
+                entry = self._entries.get(child)
+                if entry is None or entry[1] < now:
+                    return None
+                value = entry[0]
+            else:
+                value = self._assemble(child, now)
+                if value is None:
+                    return None
+            # Firebase boş düğümleri döndürmez
+            if value not in (None, {}):
+                subtree[key] = value
+        return subtree
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            path, _ = self._entries.popitem(last=False)
+            self._unmark_ancestors(path)
@@ -0,0 +1,110 @@
+# utils/write_behind_buffer.py: (sensör yazmaları için write-behind birleştirme tamponu)
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Yazmaları kısa bir pencere boyunca toplar, her yol için yalnızca son değeri
+    tutar ve hepsini arka plan thread'inden tek bir multi-path update ile yazar.
+
+    Kritik yazmalar (örn. gaz alarmı) pencereyi beklemez; bekleyen tüm
+    yazmalarla birlikte çağıran thread'de hemen yazılır.
+    """
+
+    def __init__(self, database, window_ms=100):
+        self.db = database
+        self.window = window_ms / 1000.0
+        self._pending = {}  # path -> data
+        self._deadline = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Flush'lar sıralı yapılır, eski bir değer yenisinin üzerine yazılmasın
+        self._flush_lock = threading.Lock()
+        self._running = True
+        self.submitted = 0
+        self.written = 0
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._run, name="write-behind-buffer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, data, critical=False):
+        """
+        Bir yazmayı tampona ekler.
+
+        Args:
+            path (str): Yazılacak yol (örn. "sensors/salon/gas")
+            data: Yazılacak veri
+            critical (bool): True ise tampon beklenmeden hemen yazılır
+        """
+        with self._lock:
+            self._pending[path] = data
+            self.submitted += 1
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.window
+                self._wakeup.notify()
+        if critical or not self._running:
+            self.flush()
+
+    def flush(self):
+        """Bekleyen tüm yazmaları tek bir multi-path update ile yazar."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._deadline = None
+            if not batch:
+                return 0
+            try:
+                self.db.update(batch)
+            except Exception as e:
+                logger.error(f"Tamponlanmış yazmalar kaydedilirken hata: {str(e)}")
+                with self._lock:
+                    # Bu arada gelen daha yeni değerleri ezmeden tekrar kuyruğa al
+                    for path, data in batch.items():
+                        self._pending.setdefault(path, data)
+                    if self._deadline is None:
+                        self._deadline = time.monotonic() + self.window
+                raise
+            self.written += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def stop(self):
+        """Arka plan thread'ini durdurur ve kalan yazmaları kaydeder."""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Tampon istatistiklerini döner."""
+        with self._lock:
+            return {
+                "window_ms": int(self.window * 1000),
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "written": self.written,
+                "flushes": self.flushes
+            }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._running and (self._deadline is None or time.monotonic() < self._deadline):
+                    timeout = None if self._deadline is None else self._deadline - time.monotonic()
+                    self._wakeup.wait(timeout)
+                if not self._running:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # Hata loglandı; değerler bir sonraki pencerede tekrar denenir
+                time.sleep(self.window)